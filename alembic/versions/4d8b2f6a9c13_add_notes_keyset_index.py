@@ -0,0 +1,30 @@
+"""add_notes_keyset_index
+
+    Revision ID: 4d8b2f6a9c13
+    Revises: 9a3d5e7f1b20
+    Create Date: 2026-10-16 14:05:37.201594
+
+    """
+from typing import Sequence, Union
+
+from alembic import op
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f6a9c13'
+down_revision: Union[str, None] = '9a3d5e7f1b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    """Add composite index backing keyset pagination of notes"""
+
+    op.execute("""
+        CREATE INDEX ix_notes_user_sort_id
+        ON notes (user_id, created_at DESC, id DESC)
+    """)
+
+
+def downgrade():
+    """Remove keyset pagination index"""
+
+    op.drop_index('ix_notes_user_sort_id', 'notes')
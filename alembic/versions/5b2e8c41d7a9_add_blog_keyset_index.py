@@ -0,0 +1,30 @@
+"""add_blog_keyset_index
+
+    Revision ID: 5b2e8c41d7a9
+    Revises: 95166c2b746f
+    Create Date: 2026-10-16 10:12:04.318877
+
+    """
+from typing import Sequence, Union
+
+from alembic import op
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8c41d7a9'
+down_revision: Union[str, None] = '95166c2b746f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    """Add composite index backing keyset pagination of blog posts"""
+
+    op.execute("""
+        CREATE INDEX ix_blog_posts_author_updated_id
+        ON blog_posts (author_id, updated_at DESC, id DESC)
+    """)
+
+
+def downgrade():
+    """Remove keyset pagination index"""
+
+    op.drop_index('ix_blog_posts_author_updated_id', 'blog_posts')
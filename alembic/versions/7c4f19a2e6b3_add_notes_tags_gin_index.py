@@ -0,0 +1,30 @@
+"""add_notes_tags_gin_index
+
+    Revision ID: 7c4f19a2e6b3
+    Revises: 5b2e8c41d7a9
+    Create Date: 2026-10-16 11:02:47.512093
+
+    """
+from typing import Sequence, Union
+
+from alembic import op
+# revision identifiers, used by Alembic.
+revision: str = '7c4f19a2e6b3'
+down_revision: Union[str, None] = '5b2e8c41d7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    """Add GIN index backing jsonb containment filters on note tags"""
+
+    op.execute("""
+        CREATE INDEX ix_notes_tags_jsonb
+        ON notes USING gin ((tags::jsonb) jsonb_path_ops)
+    """)
+
+
+def downgrade():
+    """Remove note tags GIN index"""
+
+    op.drop_index('ix_notes_tags_jsonb', 'notes')
@@ -0,0 +1,51 @@
+"""generate_notes_words_count
+
+    Revision ID: 9a3d5e7f1b20
+    Revises: 7c4f19a2e6b3
+    Create Date: 2026-10-16 11:40:13.208615
+
+    """
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3d5e7f1b20'
+down_revision: Union[str, None] = '7c4f19a2e6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WORDS_COUNT_SQL = (
+    r"CASE WHEN content ~ '^\s*$' THEN 0 ELSE array_length("
+    r"regexp_split_to_array(regexp_replace(content, '^\s+|\s+$', '', 'g'), "
+    r"'\s+'), 1) END"
+)
+
+
+def upgrade():
+    """Make notes.words_count a stored generated column"""
+
+    op.drop_column('notes', 'words_count')
+    op.add_column(
+        'notes',
+        sa.Column(
+            'words_count',
+            sa.Integer(),
+            sa.Computed(WORDS_COUNT_SQL, persisted=True),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade():
+    """Revert notes.words_count to an application-maintained column"""
+
+    op.drop_column('notes', 'words_count')
+    op.add_column(
+        'notes',
+        sa.Column(
+            'words_count', sa.Integer(), nullable=False, server_default='0'
+        ),
+    )
+    op.execute(f"UPDATE notes SET words_count = {WORDS_COUNT_SQL}")
@@ -7,7 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError, HTTPException
 
 from project.config import settings
-from project.config_validator import config_validator
+from project.config_validator import check_and_exit_on_errors
 from project.schemas.response import error_response
 from project.schemas.errors import ErrorCode
 from project.middleware.cache import cache, CacheMiddleware
@@ -18,7 +18,12 @@ broadcast = Broadcast(settings.WS_MESSAGE_QUEUE)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown with cache initialization"""
-    config_validator.check_and_exit_on_errors()
+    # Log writer thread lives in the serving process, not the one that
+    # built the app (workers may be forked after import)
+    from project.logging import start_log_listener, stop_log_listener
+    start_log_listener()
+
+    check_and_exit_on_errors()
 
     # Initialize cache
     await cache.init()
@@ -26,11 +31,17 @@ async def lifespan(app: FastAPI):
     # Connect broadcast
     await broadcast.connect()
 
+    # Build the result backend's Redis pool once, shared by status lookups
+    backend_client = getattr(app.celery_app.backend, "client", None)
+
     yield
 
     # Cleanup
     await cache.close()
     await broadcast.disconnect()
+    if backend_client is not None:
+        backend_client.connection_pool.disconnect()
+    stop_log_listener()
 
 
 def create_app() -> FastAPI:
@@ -57,31 +68,21 @@ def create_app() -> FastAPI:
         expose_headers=["Set-Cookie", "X-Request-ID"],
     )
 
-    # Performance monitoring - FIRST for accurate timing
-    from project.middleware.performance import PerformanceMiddleware
-    app.add_middleware(PerformanceMiddleware)
-
-    # Cache middleware - SECOND for early cache hits
+    # Cache middleware - FIRST for early cache hits
     app.add_middleware(CacheMiddleware)
 
-    # Request logging
-    from project.middleware.request_logger import RequestLoggerMiddleware
-    app.add_middleware(RequestLoggerMiddleware)
-
-    # Security middleware
-    from project.middleware.exception_handlers import (
-        exception_handler_middleware
+    # Request ID, logging, timing and error capture
+    from project.middleware.observability import (
+        UnifiedObservabilityMiddleware
     )
-    from project.middleware.validation import validation_middleware
-    from project.middleware.rate_limiter import rate_limit_middleware
-    from project.middleware.throttler import throttle_middleware
+    app.add_middleware(UnifiedObservabilityMiddleware)
+
+    # Security middleware - throttle, rate limit and validate in one pass
     from project.middleware.csrf import csrf_middleware
+    from project.middleware.security import SecurityMiddleware
 
-    app.middleware("http")(exception_handler_middleware)
-    app.middleware("http")(validation_middleware)
     app.middleware("http")(csrf_middleware)
-    app.middleware("http")(rate_limit_middleware)
-    app.middleware("http")(throttle_middleware)
+    app.add_middleware(SecurityMiddleware)
 
     # Exception handlers
     @app.exception_handler(HTTPException)
@@ -108,8 +109,8 @@ def create_app() -> FastAPI:
         )
 
     # Initialize Celery
-    from project.celery_utils import create_celery
-    app.celery_app = create_celery()
+    from project.celery_utils import get_celery_app
+    app.celery_app = get_celery_app()
 
     # Register routers via API module
     from project.api import api_v1, api_root, register_routers
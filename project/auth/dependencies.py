@@ -96,6 +96,19 @@ async def get_current_user(
         )
 
 
+async def get_current_user_optional(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        optional_security
+    ),
+    session: Session = Depends(get_db_session),
+) -> Optional[User]:
+    """Resolve user only when a token is sent; anonymous skips auth."""
+    if not _extract_token(request, credentials):
+        return None
+    return await get_current_user(request, credentials, session)
+
+
 def get_current_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
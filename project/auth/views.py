@@ -261,7 +261,7 @@ async def logout(
         user_id = str(current_user.id)
 
         # Clear session cache
-        await cache.delete(f"session:{user_id}")
+        await cache.unlink(f"session:{user_id}")
 
         # Clear all user caches
         await cache.invalidate_user_cache(user_id)
@@ -307,7 +307,7 @@ async def refresh_token(
         user_id = str(current_user.id)
 
         # Clear session cache to force refresh
-        await cache.delete(f"session:{user_id}")
+        await cache.unlink(f"session:{user_id}")
 
         # Refresh Supabase session
         supabase_response = supabase.auth.refresh_session(refresh_token)
@@ -350,7 +350,7 @@ async def invalidate_session(
 ):
     """Force invalidate session cache (admin/debug)"""
     user_id = str(current_user.id)
-    await cache.delete(f"session:{user_id}")
+    await cache.unlink(f"session:{user_id}")
 
     return success_response(
         message="Session cache invalidated"
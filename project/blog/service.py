@@ -1,10 +1,12 @@
 """Production-optimized Blog Service with maximum performance"""
 
+import base64
+import json
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
 
-from sqlalchemy import select, func, and_, or_, case, exists
+from sqlalchemy import select, func, and_, or_, case, exists, tuple_
 from sqlalchemy.orm import Session, selectinload, load_only
 from slugify import slugify
 
@@ -14,6 +16,25 @@ from project.blog.parser import BlogContentParser
 logger = logging.getLogger(__name__)
 
 
+def _encode_cursor(sort_value: Any, post_id: int) -> str:
+    """Opaque keyset cursor from the last row's (sort value, id)"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, post_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """Decode cursor back into (sort value, id)"""
+    try:
+        sort_value, post_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if sort_by != "title":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
 class BlogService:
     """High-performance blog service with optimized queries"""
 
@@ -47,8 +68,6 @@ class BlogService:
             )
 
             self.db.add(post)
-            self.db.flush()
-            self.db.refresh(post)
             self.db.commit()
 
             return post
@@ -63,26 +82,32 @@ class BlogService:
     ) -> None:
         """Save content with bulk section insert"""
         try:
-            # Get post
-            post = self.db.scalar(
-                select(BlogPost).where(BlogPost.id == post_id)
+            # Only the current title is needed, skip full row hydration
+            current_title = self.db.scalar(
+                select(BlogPost.title).where(BlogPost.id == post_id)
             )
 
-            if not post:
+            if current_title is None:
                 raise ValueError("Post not found")
 
             # Parse content
             parsed = BlogContentParser.parse(generated_text)
 
             # Update post
-            post.title = parsed["title"] or post.title
-            post.excerpt = parsed["excerpt"]
-            post.content = generated_text
+            self.db.execute(
+                BlogPost.__table__.update()
+                .where(BlogPost.id == post_id)
+                .values(
+                    title=parsed["title"] or current_title,
+                    excerpt=parsed["excerpt"],
+                    content=generated_text,
+                )
+            )
 
             # Bulk insert sections
             sections = [
                 BlogSection(
-                    post_id=post.id,
+                    post_id=post_id,
                     title=section_data["title"],
                     content=section_data["content"],
                     section_type=section_data["type"],
@@ -106,20 +131,40 @@ class BlogService:
 
     def list_posts(
         self,
-        user_id: int,
+        user_id: Optional[int],
         search: Optional[str] = None,
         status: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
         sort_by: str = "updated_at",
         sort_order: str = "desc",
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Optimized list with window function for count"""
+        """List posts; keyset-paginated when a cursor is given"""
+
+        # Anonymous listing spans all authors
+        filters = []
+        if user_id is not None:
+            filters.append(BlogPost.author_id == user_id)
+
+        # Apply filters
+        if search:
+            search_pattern = f"%{search}%"
+            filters.append(
+                or_(
+                    BlogPost.title.ilike(search_pattern),
+                    BlogPost.content.ilike(search_pattern),
+                    BlogPost.excerpt.ilike(search_pattern),
+                )
+            )
+
+        if status:
+            filters.append(BlogPost.status == status)
 
         # Base query with selective loading
         query = (
             select(BlogPost)
-            .where(BlogPost.author_id == user_id)
+            .where(*filters)
             .options(
                 load_only(
                     BlogPost.id,
@@ -136,39 +181,48 @@ class BlogService:
             )
         )
 
-        # Apply filters
-        if search:
-            search_pattern = f"%{search}%"
+        # Apply sorting, id breaks ties so the keyset is unique
+        sort_col = getattr(BlogPost, sort_by, BlogPost.updated_at)
+        if sort_order == "desc":
+            query = query.order_by(sort_col.desc(), BlogPost.id.desc())
+        else:
+            query = query.order_by(sort_col.asc(), BlogPost.id.asc())
+
+        # Paginate: seek past the cursor, OFFSET only for legacy page mode.
+        # Keyset mode skips the count entirely.
+        total = None
+        if cursor:
+            sort_value, last_id = _decode_cursor(cursor, sort_by)
+            keyset = tuple_(sort_col, BlogPost.id)
             query = query.where(
-                or_(
-                    BlogPost.title.ilike(search_pattern),
-                    BlogPost.content.ilike(search_pattern),
-                    BlogPost.excerpt.ilike(search_pattern),
-                )
+                keyset < (sort_value, last_id)
+                if sort_order == "desc"
+                else keyset > (sort_value, last_id)
+            )
+        else:
+            # Plain count over the filters - no ordering or projection
+            total = self.db.scalar(
+                select(func.count()).select_from(BlogPost).where(*filters)
             )
+            query = query.offset((page - 1) * page_size)
 
-        if status:
-            query = query.where(BlogPost.status == status)
+        # One extra row tells us whether another page exists
+        posts = list(self.db.scalars(query.limit(page_size + 1)))
+        has_more = len(posts) > page_size
+        posts = posts[:page_size]
 
-        # Get total count efficiently
-        count_query = select(func.count()).select_from(query.subquery())
-        total = self.db.scalar(count_query)
-
-        # Apply sorting
-        sort_col = getattr(BlogPost, sort_by, BlogPost.updated_at)
-        query = query.order_by(
-            sort_col.desc() if sort_order == "desc" else sort_col.asc()
-        )
-
-        # Paginate
-        offset = (page - 1) * page_size
-        posts = list(self.db.scalars(query.offset(offset).limit(page_size)))
+        next_cursor = None
+        if has_more:
+            last = posts[-1]
+            next_cursor = _encode_cursor(getattr(last, sort_col.key), last.id)
 
         return {
             "posts": posts,
             "total_count": total,
             "page": page,
             "page_size": page_size,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
         }
 
     def get_post_by_id(
@@ -194,22 +248,6 @@ class BlogService:
 
     # ==================== STATISTICS ====================
 
-    def count_user_posts(self, user_id: int) -> int:
-        """Fast count query"""
-        return self.db.scalar(
-            select(func.count(BlogPost.id)).where(
-                BlogPost.author_id == user_id
-            )
-        )
-
-    def count_by_status(self, user_id: int, status: str) -> int:
-        """Count posts by status"""
-        return self.db.scalar(
-            select(func.count(BlogPost.id)).where(
-                and_(BlogPost.author_id == user_id, BlogPost.status == status)
-            )
-        )
-
     def get_blog_stats(self, user_id: int) -> Dict[str, Any]:
         """Get all stats in single query"""
         result = self.db.execute(
@@ -239,7 +277,8 @@ class BlogService:
             "published": result.published or 0,
             "archived": result.archived or 0,
             "total_views": result.total_views or 0,
-            "avg_read_time": round(result.avg_read_time or 0, 1),
+            # avg() comes back as Decimal, which orjson can't encode
+            "avg_read_time": round(float(result.avg_read_time or 0), 1),
         }
 
     # ==================== UPDATE ====================
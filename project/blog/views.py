@@ -1,38 +1,126 @@
 """Blog views with comprehensive caching"""
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Optional
-from fastapi import Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse
+import re
+from typing import Literal, Optional, Union
+
+import orjson
+from fastapi import Depends, HTTPException, status, Query
+from fastapi.responses import Response
+from sse_starlette.sse import EventSourceResponse
 from sqlalchemy.orm import Session
 
 from . import blog_router
 from project.database import get_db_session
-from project.auth.dependencies import get_current_user
+from project.auth.dependencies import (
+    get_current_user,
+    get_current_user_optional,
+)
 from project.auth.models import User
 from project.blog.service import BlogService
 from project.blog.ollama_blog_service import ollama_blog_generator
-from project.blog.schemas import GenerateRequest, PostResponse, PostUpdate
-from project.schemas.response import success_response
+from project.blog.models import BlogPost
+from project.blog.schemas import (
+    GenerateRequest,
+    PostResponse,
+    PostUpdate,
+    SectionResponse,
+)
+from project.schemas.response import success_response, envelope_parts
 from project.middleware.cache import cache
 
 logger = logging.getLogger(__name__)
 
+# Query enums validated by set membership instead of regex
+PostStatus = Literal["draft", "published", "archived"]
+SortField = Literal["created_at", "updated_at", "title"]
+SortOrder = Literal["asc", "desc"]
 
-async def invalidate_blog_caches(user_id: str, post_id: int = None):
-    """Helper to invalidate blog-related caches"""
-    patterns = [
-        f"blog_posts:{user_id}:*",
+# Max generated chunks buffered ahead of a slow SSE client
+STREAM_QUEUE_SIZE = 64
+_STREAM_DONE = object()
+
+# Keep-alive comment interval so proxies don't drop long generations
+SSE_PING_SECONDS = 15
+
+# Characters that force a real JSON encode of a streamed chunk: quotes,
+# backslashes, control and non-ASCII characters, which json.dumps escapes
+# (ensure_ascii), so both paths emit the same bytes
+_NEEDS_ESCAPE = re.compile(r'["\\]|[^\x20-\x7e]')
+
+
+# Cached in place of a post body when the post doesn't exist
+_MISSING_POST = b'{"__missing__": true}'
+MISSING_POST_TTL = 30
+
+# Response fields read straight off ORM rows for cached endpoints
+_POST_FIELDS = tuple(PostResponse.model_fields)
+_SECTION_FIELDS = tuple(SectionResponse.model_fields)
+
+
+def _post_to_dict(post: BlogPost) -> dict:
+    """Trusted DB row to PostResponse-shaped dict, no validation pass"""
+    data = {field: getattr(post, field) for field in _POST_FIELDS}
+    data["sections"] = [
+        {field: getattr(section, field) for field in _SECTION_FIELDS}
+        for section in post.sections
     ]
+    return data
+
+
+def _chunk_frame(text_chunk: str) -> bytes:
+    """SSE frame for a token chunk; plain text skips json.dumps"""
+    if _NEEDS_ESCAPE.search(text_chunk) is None:
+        return b'data: {"chunk": "' + text_chunk.encode() + b'"}\n\n'
+    return f"data: {json.dumps({'chunk': text_chunk})}\n\n".encode()
+
+
+# Strong refs so pending fire-and-forget tasks aren't garbage collected
+_background_tasks: set = set()
+
+
+def _log_task_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background cache task failed: {task.exception()}")
+
+
+def _fire_and_forget(coro):
+    """Schedule coro on the loop without holding up the response"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_log_task_error)
+    return task
+
+
+def _list_cache_key(user_id: str, *params) -> str:
+    """Fixed-length list cache key: user prefix plus BLAKE2b of the query"""
+    tail = ":".join("" if p is None else str(p) for p in params)
+    digest = hashlib.blake2b(tail.encode(), digest_size=16).hexdigest()
+    return f"blog_posts:{user_id}:{digest}"
+
+
+def _json_response(body: Union[str, bytes]) -> Response:
+    """Return a pre-encoded JSON body, skipping FastAPI serialization"""
+    return Response(content=body, media_type="application/json")
+
+
+async def invalidate_blog_caches(user_id: str, post_id: int = None):
+    """Helper to invalidate blog-related caches via per-user index sets"""
+    indexes = [f"blog_posts_idx:{user_id}", "blog_posts_idx:anon"]
+    keys = [f"blog_stats:{user_id}"]
     if post_id:
-        patterns.append(f"blog_post:{post_id}")
+        keys.append(f"blog_post:{user_id}:{post_id}")
+    else:
+        indexes.append(f"blog_post_idx:{user_id}")
 
-    for pattern in patterns:
-        await cache.delete(pattern)
+    await cache.delete_indexed(*indexes, keys=keys)
 
 
-@blog_router.post("/generate/stream", response_class=StreamingResponse)
+@blog_router.post("/generate/stream", response_class=EventSourceResponse)
 async def stream_blog_generation(
     request: GenerateRequest,
     user: User = Depends(get_current_user),
@@ -46,43 +134,59 @@ async def stream_blog_generation(
         original_content=request.content,
     )
 
-    async def event_stream():
-        full_text = ""
+    async def fill_queue(queue: asyncio.Queue):
+        """Producer: drain Ollama into the queue at model speed"""
         try:
-            yield f"data: {json.dumps({'post_id': post.id})}\n\n"
-
             async for text_chunk in ollama_blog_generator.generate_stream(
                 title=request.title, content=request.content
             ):
-                full_text += text_chunk
-                yield f"data: {json.dumps({'chunk': text_chunk})}\n\n"
+                await queue.put(text_chunk)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_STREAM_DONE)
+
+    async def event_stream():
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        producer = asyncio.create_task(fill_queue(queue))
+        parts: list[str] = []
+        try:
+            yield b'data: {"post_id": %d}\n\n' % post.id
 
-            service.save_generated_content(post.id, full_text)
+            while True:
+                text_chunk = await queue.get()
+                if text_chunk is _STREAM_DONE:
+                    break
+                if isinstance(text_chunk, Exception):
+                    raise text_chunk
+                parts.append(text_chunk)
+                yield _chunk_frame(text_chunk)
+
+            service.save_generated_content(post.id, "".join(parts))
 
             # Invalidate list cache after generation
             await invalidate_blog_caches(str(user.id), post.id)
 
-            yield f"data: {json.dumps({'done': True, 'post_id': post.id})}\n\n"
+            yield {"data": json.dumps({"done": True, "post_id": post.id})}
 
         except Exception as e:
             logger.error(f"Stream error: {e}")
             service.mark_failed(post.id)
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        },
+            yield {"data": json.dumps({"error": str(e)})}
+
+        finally:
+            # Client gone or stream failed - stop generation on Ollama
+            if not producer.done():
+                producer.cancel()
+
+    # Sets no-cache/keep-alive/X-Accel-Buffering and sends pings
+    return EventSourceResponse(
+        event_stream(), ping=SSE_PING_SECONDS, sep="\n"
     )
 
 
 @blog_router.post("/posts/{post_id}/complete")
 async def complete_generation(
     post_id: int,
-    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db_session),
 ):
@@ -92,9 +196,7 @@ async def complete_generation(
         post = service.mark_complete(post_id, user.id)
 
         # Invalidate caches
-        background_tasks.add_task(
-            invalidate_blog_caches, str(user.id), post_id
-        )
+        _fire_and_forget(invalidate_blog_caches(str(user.id), post_id))
 
         return success_response(
             data=PostResponse.model_validate(post),
@@ -109,82 +211,89 @@ async def complete_generation(
 @blog_router.get("/posts")
 async def list_blog_posts(
     search: Optional[str] = Query(None),
-    status_filter: Optional[str] = Query(
-        None, pattern="^(draft|published|archived)$", alias="status"
-    ),
-    page: int = Query(1, ge=1),
+    status_filter: Optional[PostStatus] = Query(None, alias="status"),
+    page: int = Query(1, ge=1, deprecated=True),
     page_size: int = Query(20, ge=1, le=100),
-    sort_by: str = Query(
-        "updated_at", pattern="^(created_at|updated_at|title)$"
-    ),
-    sort_order: str = Query("desc", pattern="^(asc|desc)$"),
-    user: User = Depends(get_current_user),
+    sort_by: SortField = Query("updated_at"),
+    sort_order: SortOrder = Query("desc"),
+    cursor: Optional[str] = Query(None),
+    user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db_session),
 ):
-    """List blog posts with 60s cache"""
-    user_id = str(user.id)
-
-    # Build cache key
-    cache_key = (
-        f"blog_posts:{user_id}:{page}:{page_size}:{sort_by}:{sort_order}"
+    """List blog posts with 60s cache (anonymous sees published only)"""
+    if user is None:
+        status_filter = "published"
+    user_id = str(user.id) if user else "anon"
+
+    # Build cache key - query tail hashed so long searches stay bounded
+    cache_key = _list_cache_key(
+        user_id,
+        page,
+        page_size,
+        sort_by,
+        sort_order,
+        search,
+        status_filter,
+        cursor,
     )
-    if search:
-        cache_key += f":search:{search}"
-    if status_filter:
-        cache_key += f":status:{status_filter}"
 
-    # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data={
-                "posts": [PostResponse(**p) for p in cached_data["posts"]],
-                "total_count": cached_data["total_count"],
-                "page": cached_data["page"],
-                "page_size": cached_data["page_size"],
-            },
-            message="Posts retrieved successfully",
-        )
+    # Try cache - stored as the final JSON body, zstd-compressed
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss - query DB
     try:
         service = BlogService(db)
         result = service.list_posts(
-            user_id=user.id,
+            user_id=user.id if user else None,
             search=search,
             status=status_filter,
             page=page,
             page_size=page_size,
             sort_by=sort_by,
             sort_order=sort_order,
+            cursor=cursor,
         )
 
-        # Convert to dicts for caching
-        posts_data = [
-            PostResponse.model_validate(post).model_dump()
-            for post in result["posts"]
-        ]
+        head, tail = envelope_parts(
+            success_response(
+                data={
+                    "posts": [],
+                    "total_count": result["total_count"],
+                    "page": result["page"],
+                    "page_size": result["page_size"],
+                    "has_more": result["has_more"],
+                    "next_cursor": result["next_cursor"],
+                },
+                message="Posts retrieved successfully",
+            ),
+            "data",
+            "posts",
+        )
+        # Splice pre-encoded posts into the envelope; the page is bounded
+        # by page_size, so one body is built and cached up front
+        body = (
+            head
+            + b",".join(
+                orjson.dumps(_post_to_dict(post), default=str)
+                for post in result["posts"]
+            )
+            + tail
+        )
 
-        response_data = {
-            "posts": posts_data,
-            "total_count": result["total_count"],
-            "page": result["page"],
-            "page_size": result["page_size"],
-        }
+        # Cache for 60 seconds; hits replay the body as built, so its
+        # timestamp is when the list was read, not when it was served
+        await cache.set_compressed(
+            cache_key, body, ttl=60, index=f"blog_posts_idx:{user_id}"
+        )
 
-        # Cache for 60 seconds
-        await cache.set(cache_key, response_data, ttl=60)
+        return _json_response(body)
 
-        return success_response(
-            data={
-                "posts": [PostResponse(**p) for p in posts_data],
-                "total_count": result["total_count"],
-                "page": result["page"],
-                "page_size": result["page_size"],
-            },
-            message="Posts retrieved successfully",
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         )
-
     except Exception as e:
         logger.error(f"List posts error: {e}")
         raise HTTPException(
@@ -200,15 +309,16 @@ async def get_blog_post(
     db: Session = Depends(get_db_session),
 ):
     """Get single post with 5min cache"""
-    cache_key = f"blog_post:{post_id}"
+    cache_key = f"blog_post:{user.id}:{post_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=PostResponse(**cached_data),
-            message="Post retrieved successfully",
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body == _MISSING_POST:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
         )
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     try:
@@ -216,19 +326,32 @@ async def get_blog_post(
         post = service.get_post_by_id(post_id, user.id)
 
         if not post:
+            # Negative-cache briefly so retries on deleted IDs skip the DB
+            await cache.set_raw(
+                cache_key,
+                _MISSING_POST,
+                ttl=MISSING_POST_TTL,
+                index=f"blog_post_idx:{user.id}",
+            )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
             )
 
-        # Cache for 5 minutes
-        post_data = PostResponse.model_validate(post).model_dump()
-        await cache.set(cache_key, post_data, ttl=300)
+        body = orjson.dumps(
+            success_response(
+                data=_post_to_dict(post),
+                message="Post retrieved successfully",
+            ),
+            default=str,
+        )
 
-        return success_response(
-            data=PostResponse(**post_data),
-            message="Post retrieved successfully",
+        # Cache for 5 minutes
+        await cache.set_compressed(
+            cache_key, body, ttl=300, index=f"blog_post_idx:{user.id}"
         )
 
+        return _json_response(body)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -243,7 +366,6 @@ async def get_blog_post(
 async def update_blog_post(
     post_id: int,
     data: PostUpdate,
-    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db_session),
 ):
@@ -255,9 +377,7 @@ async def update_blog_post(
         )
 
         # Invalidate caches
-        background_tasks.add_task(
-            invalidate_blog_caches, str(user.id), post_id
-        )
+        _fire_and_forget(invalidate_blog_caches(str(user.id), post_id))
 
         return success_response(
             data=PostResponse.model_validate(post),
@@ -279,7 +399,6 @@ async def update_blog_post(
 @blog_router.delete("/posts/{post_id}")
 async def delete_blog_post(
     post_id: int,
-    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db_session),
 ):
@@ -289,9 +408,7 @@ async def delete_blog_post(
         service.delete_post(post_id, user.id)
 
         # Invalidate caches
-        background_tasks.add_task(
-            invalidate_blog_caches, str(user.id), post_id
-        )
+        _fire_and_forget(invalidate_blog_caches(str(user.id), post_id))
 
         return success_response(
             data={"deleted": True}, message="Post deleted successfully"
@@ -319,32 +436,25 @@ async def get_blog_stats(
     cache_key = f"blog_stats:{user_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=cached_data, message="Statistics retrieved"
-        )
+    cached_body = await cache.get_raw(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     try:
         service = BlogService(db)
 
         # Get stats
-        total_posts = service.count_user_posts(user.id)
-        draft_count = service.count_by_status(user.id, "draft")
-        published_count = service.count_by_status(user.id, "published")
+        stats = service.get_blog_stats(user.id)
 
-        stats = {
-            "total_posts": total_posts,
-            "draft": draft_count,
-            "published": published_count,
-            "archived": total_posts - draft_count - published_count,
-        }
+        body = orjson.dumps(
+            success_response(data=stats, message="Statistics retrieved")
+        )
 
         # Cache for 5 minutes
-        await cache.set(cache_key, stats, ttl=300)
+        await cache.set_raw(cache_key, body, ttl=300)
 
-        return success_response(data=stats, message="Statistics retrieved")
+        return _json_response(body)
 
     except Exception as e:
         logger.error(f"Stats error: {e}")
@@ -357,7 +467,6 @@ async def get_blog_stats(
 @blog_router.post("/posts/{post_id}/publish")
 async def publish_post(
     post_id: int,
-    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db_session),
 ):
@@ -367,9 +476,7 @@ async def publish_post(
         post = service.update_post(post_id, user.id, {"status": "published"})
 
         # Invalidate caches
-        background_tasks.add_task(
-            invalidate_blog_caches, str(user.id), post_id
-        )
+        _fire_and_forget(invalidate_blog_caches(str(user.id), post_id))
 
         return success_response(
             data=PostResponse.model_validate(post),
@@ -1,7 +1,19 @@
 """Production-optimized Celery configuration"""
 
 from celery import Celery, Task
-from celery.signals import task_prerun, task_postrun, task_failure
+from celery.signals import (
+    task_prerun,
+    task_postrun,
+    task_failure,
+    worker_process_init,
+)
+from functools import lru_cache
+import httpx
+from redis.exceptions import (
+    ConnectionError as RedisConnectionError,
+    TimeoutError as RedisTimeoutError,
+)
+from sqlalchemy.exc import OperationalError
 from project.config import settings
 import logging
 
@@ -11,19 +23,20 @@ logger = logging.getLogger(__name__)
 class OptimizedTask(Task):
     """Base task with connection pooling and retries"""
 
-    autoretry_for = (Exception,)
-    retry_kwargs = {'max_retries': 3, 'countdown': 5}
+    # Only transient infrastructure errors; bugs and bad data fail once
+    autoretry_for = (
+        ConnectionError,
+        TimeoutError,
+        OperationalError,
+        RedisConnectionError,
+        RedisTimeoutError,
+        httpx.TransportError,
+    )
+    retry_kwargs = {'max_retries': 2, 'countdown': 5}
     retry_backoff = True
     retry_backoff_max = 600
     retry_jitter = True
 
-    # Cleanup after task
-    def after_return(self, status, retval, task_id, args, kwargs, einfo):
-        """Clean up resources after task completes"""
-        # Close DB connections
-        from project.database import SessionLocal
-        SessionLocal.close_all()
-
 
 def create_celery() -> Celery:
     """Create optimized Celery app"""
@@ -37,25 +50,29 @@ def create_celery() -> Celery:
 
     celery_app.conf.update(
         # Task execution
-        task_serializer='json',
-        accept_content=['json'],
-        result_serializer='json',
+        # msgpack is smaller and faster than JSON; json stays accepted so
+        # messages queued before a rollout still decode
+        task_serializer='msgpack',
+        accept_content=['msgpack', 'json'],
+        result_serializer='msgpack',
         timezone='UTC',
         enable_utc=True,
 
         # Performance
         task_acks_late=True,  # Acknowledge after completion
-        worker_prefetch_multiplier=4,  # Prefetch for efficiency
+        worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
         worker_max_tasks_per_child=1000,  # Restart workers periodically
 
         # Results
         result_expires=3600,  # 1 hour
         result_backend_transport_options={
             'master_name': 'mymaster',
-            'socket_keepalive': True,
-            'retry_on_timeout': True,
-            'max_connections': 50
         },
+        # The Redis result backend sizes its pool from these, not from
+        # result_backend_transport_options
+        redis_max_connections=50,
+        redis_socket_keepalive=True,
+        redis_retry_on_timeout=True,
 
         # Broker connection
         broker_connection_retry_on_startup=True,
@@ -79,10 +96,6 @@ def create_celery() -> Celery:
         task_soft_time_limit=300,  # 5 minutes soft
         task_time_limit=600,  # 10 minutes hard
 
-        # Optimization
-        task_compression='gzip',
-        result_compression='gzip',
-
         # Monitoring
         worker_send_task_events=True,
         task_send_sent_event=True,
@@ -100,12 +113,17 @@ def create_celery() -> Celery:
     return celery_app
 
 
+@lru_cache(maxsize=1)
+def get_celery_app() -> Celery:
+    """Shared Celery app, built once per process"""
+    return create_celery()
+
+
 def get_task_info(task_id: str) -> dict:
     """Get Celery task status and result"""
     from celery.result import AsyncResult
 
-    celery_app = create_celery()
-    result = AsyncResult(task_id, app=celery_app)
+    result = AsyncResult(task_id, app=get_celery_app())
 
     return {
         "task_id": task_id,
@@ -116,6 +134,13 @@ def get_task_info(task_id: str) -> dict:
     }
 
 
+@worker_process_init.connect
+def worker_process_init_handler(**kwargs):
+    """Drop pooled connections inherited from the parent after fork"""
+    from project.database import engine
+    engine.dispose(close=False)
+
+
 # Monitoring signals
 @task_prerun.connect
 def task_prerun_handler(task_id, task, *args, **kwargs):
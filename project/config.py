@@ -6,26 +6,49 @@ Project configuration file, with environment configs
 
 import os
 import pathlib
+from dataclasses import dataclass, field
 from typing import Optional
 from functools import lru_cache
 from kombu import Queue
 from celery.schedules import crontab
 
 
-def route_task(name, args, kwargs, options, task=None, **kw):
-    if ":" in name:
-        queue, _ = name.split(":")
-        return {"queue": queue}
-    return {"queue": "default"}
+@lru_cache(maxsize=4096)
+def _queue_for(name: str) -> str:
+    queue, sep, _ = name.partition(":")
+    return queue if sep else "default"
 
 
+def route_task(name, args, kwargs, options, task=None, **kw):
+    # Celery pops "queue" from the route, so only the name is memoized
+    return {"queue": _queue_for(name)}
+
+
+# Beat schedule shared by all configs; copied per settings instance
+CELERY_BEAT_SCHEDULE: dict = {
+    "cleanup-old-tasks": {
+        "task": "cleanup_old_tasks",
+        "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM
+        "args": (7,),  # Keep tasks for 7 days
+    },
+    # Optional: Weekly cleanup with longer retention
+    "weekly-deep-cleanup": {
+        "task": "cleanup_old_tasks",
+        "schedule": crontab(day_of_week=0, hour=3, minute=0),  # Sunday 3 AM
+        "args": (30,),  # Cleanup tasks older than 30 days
+    },
+}
+
+
+@dataclass(frozen=True, slots=True)
 class BaseConfig:
     BASE_DIR: pathlib.Path = pathlib.Path(__file__).parent.parent
 
+    DEBUG: bool = False
     DATABASE_URL: str = os.environ.get("DATABASE_URL")
     DATABASE_TEST_URL: str = os.environ.get("DATABASE_TEST_URL")
     FASTAPI_CONFIG: str = os.environ.get("FASTAPI_CONFIG")
-    DATABASE_CONNECT_DICT: dict = {}
+    DATABASE_CONNECT_DICT: dict = field(default_factory=dict)
     ANTHROPIC_API_KEY: str = os.environ.get("ANTHROPIC_API_KEY")
 
     # Ollama Configuration
@@ -46,9 +69,11 @@ class BaseConfig:
     )
 
     # Security
-    CORS_ORIGINS: list = os.environ.get(
-        "CORS_ORIGINS", "http://localhost:3000,http://localhost:8000"
-    ).split(",")
+    CORS_ORIGINS: tuple = tuple(
+        os.environ.get(
+            "CORS_ORIGINS", "http://localhost:3000,http://localhost:8000"
+        ).split(",")
+    )
 
     # Database Pool Settings
     DATABASE_POOL_SIZE: int = int(os.environ.get("DATABASE_POOL_SIZE", "10"))
@@ -68,30 +93,30 @@ class BaseConfig:
     WS_MESSAGE_QUEUE: str = os.environ.get(
         "WS_MESSAGE_QUEUE", "redis://127.0.0.1:6379/0"
     )
-    CELERY_BEAT_SCHEDULE: dict = {
-        # "task-schedule-work": {
-        #     "task": "task_schedule_work",
-        #     "schedule": 5.0,  # five seconds
-        # },
-    }
+    CELERY_BEAT_SCHEDULE: dict = field(
+        default_factory=lambda: dict(CELERY_BEAT_SCHEDULE)
+    )
     CELERY_TASK_DEFAULT_QUEUE: str = "default"
+    # Tasks are I/O-bound (Ollama, DB); a low prefetch lets idle workers
+    # pick up work instead of it queuing behind a busy peer
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = int(
+        os.environ.get("CELERY_WORKER_PREFETCH_MULTIPLIER", "2")
+    )
 
     # Force all queues to be explicitly listed in `CELERY_TASK_QUEUES`
     # # to help prevent typos
     CELERY_TASK_CREATE_MISSING_QUEUES: bool = False
 
-    CELERY_TASK_QUEUES: list = (
+    CELERY_TASK_QUEUES: tuple = (
         # need to define default queue here or exception would be raised
         Queue("default"),
         Queue("high_priority"),
         Queue("low_priority"),
     )
-    CELERY_TASK_ROUTES = {
-        "project.users.tasks.*": {
-            "queue": "high_priority",
-        },
-    }
-    CELERY_TASK_ROUTES = (route_task,)
+    # Routed by task name prefix ("queue:name"); high_priority workers run
+    # with -Ofair so long tasks don't hold back short ones reserved by the
+    # same process
+    CELERY_TASK_ROUTES: tuple = (route_task,)
 
     # Cookie Settings
 
@@ -101,50 +126,43 @@ class BaseConfig:
 
     # Performance monitoring thresholds
 
-    SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD", "1.0"))
-    SLOW_ENDPOINT_THRESHOLD = float(
+    SLOW_QUERY_THRESHOLD: float = float(
+        os.environ.get("SLOW_QUERY_THRESHOLD", "1.0")
+    )
+    SLOW_ENDPOINT_THRESHOLD: float = float(
         os.environ.get("SLOW_ENDPOINT_THRESHOLD", "2.0")
     )
-    # Add to project/config.py in BaseConfig class
-
-    CELERY_BEAT_SCHEDULE: dict = {
-        "cleanup-old-tasks": {
-            "task": "cleanup_old_tasks",
-            "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM
-            "args": (7,),  # Keep tasks for 7 days
-        },
-        # Optional: Weekly cleanup with longer retention
-        "weekly-deep-cleanup": {
-            "task": "cleanup_old_tasks",
-            "schedule": crontab(
-                day_of_week=0, hour=3, minute=0
-            ),  # Sunday 3 AM
-            "args": (30,),  # Cleanup tasks older than 30 days
-        },
-    }
+
     SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
     SUPABASE_ANON_KEY: str = os.environ.get("SUPABASE_ANON_KEY")
     SUPABASE_SERVICE_KEY: str = os.environ.get(
         "SUPABASE_SERVICE_KEY")  # For admin operations
 
 
+@dataclass(frozen=True, slots=True)
 class DevelopmentConfig(BaseConfig):
     DEBUG: bool = True
 
 
+@dataclass(frozen=True, slots=True)
 class ProductionConfig(BaseConfig):
     DEBUG: bool = False
     # Enforce SECRET_KEY in production
     SECRET_KEY: str = os.environ.get("SECRET_KEY")
-    if not SECRET_KEY:
-        raise ValueError(
-            "SECRET_KEY environment variable is required in production"
-        )
+
+    def __post_init__(self):
+        if not self.SECRET_KEY:
+            raise ValueError(
+                "SECRET_KEY environment variable is required in production"
+            )
 
 
+@dataclass(frozen=True, slots=True)
 class TestingConfig(BaseConfig):
     DATABASE_URL: str = "sqlite:///./test.db"
-    DATABASE_CONNECT_DICT: dict = {"check_same_thread": False}
+    DATABASE_CONNECT_DICT: dict = field(
+        default_factory=lambda: {"check_same_thread": False}
+    )
     SECRET_KEY: str = "test-secret-key"
     CELERY_TASK_ALWAYS_EAGER: bool = True
 
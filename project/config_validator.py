@@ -6,6 +6,7 @@ Validate configuration on startup
 
 import os
 import sys
+from functools import lru_cache
 from project.config import settings
 
 
@@ -72,25 +73,29 @@ class ConfigValidator:
 
         return self.errors, self.warnings
 
-    def check_and_exit_on_errors(self):
-        """Validate and exit if critical errors found"""
-        errors, warnings = self.validate_all()
 
-        if warnings:
-            print("⚠️  Configuration Warnings:")
-            for warning in warnings:
-                print(f"   - {warning}")
-            print()
+@lru_cache(maxsize=1)
+def validate_config():
+    """Validate once per process; settings are frozen after load"""
+    errors, warnings = ConfigValidator().validate_all()
+    return tuple(errors), tuple(warnings)
 
-        if errors:
-            print("❌ Configuration Errors:")
-            for error in errors:
-                print(f"   - {error}")
-            print("\n💡 Fix these errors before starting the application")
-            sys.exit(1)
 
-        print("✅ Configuration validation passed")
+def check_and_exit_on_errors():
+    """Validate and exit if critical errors found"""
+    errors, warnings = validate_config()
 
+    if warnings:
+        print("⚠️  Configuration Warnings:")
+        for warning in warnings:
+            print(f"   - {warning}")
+        print()
 
-# Run validation on import
-config_validator = ConfigValidator()
+    if errors:
+        print("❌ Configuration Errors:")
+        for error in errors:
+            print(f"   - {error}")
+        print("\n💡 Fix these errors before starting the application")
+        sys.exit(1)
+
+    print("✅ Configuration validation passed")
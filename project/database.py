@@ -39,28 +39,19 @@ else:
     )
 
 
-# Connection pool monitoring
-@event.listens_for(engine, "connect")
-def receive_connect(dbapi_conn, connection_record):
-    """Log new connections"""
-    logger.debug("New database connection created")
-
-
-@event.listens_for(engine, "checkout")
-def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-    """Track connection checkouts"""
-    pool = engine.pool
-    logger.debug(
-        f"Pool status: {pool.checkedout()}/{pool.size()} checked out, "
-        f"{pool.overflow()} overflow"
-    )
-
-
-@event.listens_for(engine, "checkin")
-def receive_checkin(dbapi_conn, connection_record):
-    """Clean up on connection return"""
-    # Reset session state
-    dbapi_conn.rollback()
+# Connection pool monitoring - debug only, these fire on every checkout.
+# Returned connections are already rolled back by the pool's
+# reset_on_return, so no checkin hook is needed.
+if POOL_CONFIG["echo_pool"]:
+    @event.listens_for(engine, "connect")
+    def receive_connect(dbapi_conn, connection_record):
+        """Log new connections"""
+        logger.debug("New database connection created")
+
+    @event.listens_for(engine, "checkout")
+    def receive_checkout(dbapi_conn, connection_record, connection_proxy):
+        """Track connection checkouts"""
+        logger.debug(f"Pool status: {engine.pool.status()}")
 
 
 # Session configuration with optimizations
@@ -4,15 +4,15 @@ companion/project/health.py
 Health check endpoints for monitoring
 """
 
-from fastapi import APIRouter, Depends, status
+import asyncio
+
+from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
 from sqlalchemy import text
-import redis
 from typing import Dict
 
-from project.database import get_db_session
-from project.config import settings
+from project.database import engine
+from project.middleware.cache import cache
 
 health_router = APIRouter(tags=["Health"])
 
@@ -27,7 +27,7 @@ async def health_check():
 
 
 @health_router.get("/ready")
-async def readiness_check(db: Session = Depends(get_db_session)):
+async def readiness_check():
     """
     Readiness check - verifies all dependencies are available
     Used by Kubernetes/load balancers to determine
@@ -36,22 +36,28 @@ async def readiness_check(db: Session = Depends(get_db_session)):
     checks: Dict[str, bool] = {}
     errors: Dict[str, str] = {}
 
-    # Check database
-    try:
-        db.execute(text("SELECT 1"))
-        checks["database"] = True
-    except Exception as e:
-        checks["database"] = False
-        errors["database"] = str(e)
-
-    # Check Redis
-    try:
-        r = redis.from_url(settings.CELERY_BROKER_URL)
-        r.ping()
-        checks["redis"] = True
-    except Exception as e:
-        checks["redis"] = False
-        errors["redis"] = str(e)
+    async def check_redis():
+        # Reuse the shared cache client and its pool
+        if cache.redis is None:
+            raise ConnectionError("Redis client not initialized")
+        await cache.redis.ping()
+
+    def check_database():
+        # Own connection, opened and closed on the worker thread; a
+        # request Session must not be shared across threads
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    # Run the sync DB check in a thread so both checks overlap
+    results = await asyncio.gather(
+        asyncio.to_thread(check_database),
+        check_redis(),
+        return_exceptions=True,
+    )
+    for name, result in zip(("database", "redis"), results):
+        checks[name] = not isinstance(result, Exception)
+        if not checks[name]:
+            errors[name] = str(result)
 
     # Overall status
     all_healthy = all(checks.values())
@@ -2,46 +2,147 @@
 project/logging.py - Structured JSON logging with request IDs
 """
 
+import atexit
+import copy
 import logging
-import json
+import os
+import queue
 import sys
-from datetime import datetime
+import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict
 from uuid import UUID
 
+import orjson
+
+# Datetimes in extra fields serialize as UTC with a "Z" suffix
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
 
 class JSONFormatter(logging.Formatter):
     """Format logs as JSON with request context"""
 
+    # UTC "YYYY-MM-DDTHH:MM:SS" for the last second seen, reused per record
+    _last_sec = None
+    _last_str = ""
+
+    def _timestamp(self, created: float) -> str:
+        """ISO-8601 UTC timestamp from record.created"""
+        sec = int(created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(
+                "%Y-%m-%dT%H:%M:%S", time.gmtime(sec)
+            )
+            self._last_sec = sec
+        return f"{self._last_str}.{int((created - sec) * 1e6):06d}"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
-        # Add request ID if available
-        if hasattr(record, "request_id"):
-            log_data["request_id"] = record.request_id
+        # Add request context if available
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            log_data["request_id"] = request_id
 
-        # Add user ID if available
-        if hasattr(record, "user_id"):
-            log_data["user_id"] = record.user_id
+        user_id = getattr(record, "user_id", None)
+        if user_id is not None:
+            log_data["user_id"] = user_id
 
         # Add extra fields
-        if hasattr(record, "extra"):
-            log_data.update(record.extra)
+        extra = getattr(record, "extra", None)
+        if extra:
+            log_data.update(extra)
 
         # Add exception info
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
 
-        return json.dumps(log_data)
+        return orjson.dumps(
+            log_data, default=str, option=_ORJSON_OPTIONS
+        ).decode()
+
+
+# Records waiting for the listener; past this, emit() writes inline
+LOG_QUEUE_SIZE = 10_000
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """Enqueue records as-is; the stock prepare() pre-formats for pickling"""
+
+    def __init__(self, log_queue: queue.Queue, target: logging.Handler):
+        super().__init__(log_queue)
+        self.target = target
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        # The copy is shallow; snapshot extras so a caller mutating its
+        # dict after logging can't change what the listener formats
+        extra = getattr(record, "extra", None)
+        if isinstance(extra, dict):
+            record.extra = dict(extra)
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        # Only queue while this process's listener drains it: before
+        # startup, after shutdown and in forked or Celery workers the
+        # listener thread doesn't exist, so write directly
+        if _listener_pid != os.getpid():
+            self.target.handle(record)
+            return
+        try:
+            self.enqueue(self.prepare(record))
+        except queue.Full:
+            # Listener is behind; block this caller rather than grow memory
+            self.target.handle(record)
+        except Exception:
+            self.handleError(record)
+
+
+# Drains queued records to the real handler on a background thread,
+# started per process by start_log_listener()
+_handler = None
+_listener = None
+_listener_pid = None
+
+
+def start_log_listener():
+    """Start draining the log queue in this process"""
+    global _listener, _listener_pid
+    if _handler is None or _listener_pid == os.getpid():
+        return
+
+    _listener = QueueListener(
+        _handler.queue, _handler.target, respect_handler_level=True
+    )
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def stop_log_listener():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _listener_pid
+    if _listener_pid != os.getpid():
+        return
+
+    # Write inline from here on, then drain what was already queued
+    _listener_pid = None
+    _listener.stop()
+    _listener = None
+
+
+atexit.register(stop_log_listener)
 
 
 def configure_logging():
     """Configure structured logging"""
+    global _handler
 
     # Root logger
     root_logger = logging.getLogger()
@@ -49,11 +150,14 @@ def configure_logging():
 
     # Remove existing handlers
     root_logger.handlers.clear()
+    stop_log_listener()
 
-    # JSON handler for stdout
+    # JSON handler for stdout, fed from a bounded queue once the listener
+    # runs, so request paths never block on stream I/O
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(handler)
+    _handler = _InProcessQueueHandler(queue.Queue(LOG_QUEUE_SIZE), handler)
+    root_logger.addHandler(_handler)
 
     # Set levels for specific loggers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -1,16 +1,58 @@
 """Production-grade Redis caching middleware"""
 
+import asyncio
 import json
 import hashlib
-from typing import Optional, Callable
+import time
+from typing import Dict, Optional, Callable, Union
 from functools import wraps
+import msgpack
 import redis.asyncio as aioredis
-from fastapi.responses import JSONResponse
+import zstandard as zstd
+from redis.client import NEVER_DECODE
 from project.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Marks zstd payloads; plain JSON entries never start with it
+ZSTD_PREFIX = b"Z"
+_zstd_compressor = zstd.ZstdCompressor(level=3)
+_zstd_decompressor = zstd.ZstdDecompressor()
+
+# set()/get() values: one tag byte, then msgpack (zstd'd above threshold).
+# Legacy JSON entries start with "{" or "[" and are still readable.
+MSGPACK_TAG = b"\x00"
+MSGPACK_ZSTD_TAG = b"\x01"
+COMPRESS_THRESHOLD = 4096
+
+
+def _encode_default(obj):
+    """ISO strings for dates, str() for UUIDs and anything else"""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _pack(value) -> bytes:
+    """Encode a cache value, compressing large payloads"""
+    packed = msgpack.packb(value, default=_encode_default, use_bin_type=True)
+    if len(packed) > COMPRESS_THRESHOLD:
+        return MSGPACK_ZSTD_TAG + _zstd_compressor.compress(packed)
+    return MSGPACK_TAG + packed
+
+
+def _unpack(data: bytes):
+    """Decode a value written by _pack, or a legacy JSON entry"""
+    tag = data[:1]
+    if tag == MSGPACK_TAG:
+        return msgpack.unpackb(data[1:], strict_map_key=False)
+    if tag == MSGPACK_ZSTD_TAG:
+        return msgpack.unpackb(
+            _zstd_decompressor.decompress(data[1:]), strict_map_key=False
+        )
+    return json.loads(data)
+
 
 class CacheManager:
     """Async Redis cache with compression and TTL"""
@@ -18,6 +60,8 @@ class CacheManager:
     def __init__(self):
         self.redis: Optional[aioredis.Redis] = None
         self.enabled = False
+        # In-flight @cached misses, so concurrent callers share one call
+        self.inflight: Dict[str, asyncio.Future] = {}
 
     async def init(self):
         """Initialize Redis connection"""
@@ -42,65 +86,165 @@ class CacheManager:
 
     def _make_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate cache key from args"""
-        key_data = f"{prefix}:{args}:{sorted(kwargs.items())}"
-        return f"cache:{hashlib.md5(key_data.encode()).hexdigest()}"
+        if kwargs:
+            key_data = f"{prefix}:{args}:{sorted(kwargs.items())}"
+        else:
+            key_data = f"{prefix}:{args}"
+        digest = hashlib.blake2b(key_data.encode(), digest_size=16)
+        return f"cache:{digest.hexdigest()}"
 
     async def get(self, key: str) -> Optional[dict]:
         """Get cached value"""
+        data = await self.get_bytes(key)
+        if not data:
+            return None
+
+        try:
+            return _unpack(data)
+        except Exception as e:
+            logger.error(f"Cache decode error: {e}")
+            return None
+
+    async def get_raw(self, key: str) -> Optional[str]:
+        """Get cached payload as stored, without decoding"""
+        if not self.enabled:
+            return None
+
+        try:
+            return await self.redis.get(key)
+        except Exception as e:
+            logger.error(f"Cache get error: {e}")
+            return None
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Get cached payload as raw bytes, bypassing response decoding"""
         if not self.enabled:
             return None
 
         try:
-            data = await self.redis.get(key)
-            return json.loads(data) if data else None
+            return await self.redis.execute_command(
+                "GET", key, **{NEVER_DECODE: True}
+            )
         except Exception as e:
             logger.error(f"Cache get error: {e}")
             return None
 
+    async def get_compressed(self, key: str) -> Optional[bytes]:
+        """Get a payload stored by set_compressed, decompressed"""
+        data = await self.get_bytes(key)
+        if data and data.startswith(ZSTD_PREFIX):
+            try:
+                return _zstd_decompressor.decompress(data[1:])
+            except Exception as e:
+                logger.error(f"Cache decompress error: {e}")
+                return None
+        return data
+
     async def set(
         self,
         key: str,
         value: dict,
-        ttl: int = 300
+        ttl: int = 300,
+        index: Optional[str] = None,
+        nx: bool = False
     ) -> bool:
-        """Set cache with TTL (seconds)"""
+        """Set cache with TTL (seconds), optionally tracked in an index set"""
+        return await self.set_raw(key, _pack(value), ttl, index, nx)
+
+    async def set_raw(
+        self,
+        key: str,
+        payload: Union[str, bytes],
+        ttl: int = 300,
+        index: Optional[str] = None,
+        nx: bool = False
+    ) -> bool:
+        """Store an already-encoded payload with TTL (seconds); nx=True
+        only writes if the key is absent"""
         if not self.enabled:
             return False
 
         try:
-            await self.redis.setex(
-                key,
-                ttl,
-                json.dumps(value)
-            )
+            if index is None:
+                return bool(await self.redis.set(key, payload, ex=ttl, nx=nx))
+
+            # Same round-trip: write value and record key in the index.
+            # The index TTL only ever grows so it outlives every member.
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, payload, ex=ttl, nx=nx)
+            pipe.sadd(index, key)
+            pipe.expire(index, ttl, nx=True)
+            pipe.expire(index, ttl, gt=True)
+            await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Cache set error: {e}")
             return False
 
-    async def delete(self, pattern: str) -> int:
-        """Delete keys matching pattern"""
+    async def set_compressed(
+        self,
+        key: str,
+        payload: bytes,
+        ttl: int = 300,
+        index: Optional[str] = None
+    ) -> bool:
+        """Store an encoded payload zstd-compressed with TTL (seconds)"""
+        return await self.set_raw(
+            key,
+            ZSTD_PREFIX + _zstd_compressor.compress(payload),
+            ttl,
+            index,
+        )
+
+    async def unlink(self, *keys: str) -> int:
+        """Remove keys; Redis reclaims memory off the main thread"""
+        if not self.enabled or not keys:
+            return 0
+
+        try:
+            return await self.redis.unlink(*keys)
+        except Exception as e:
+            logger.error(f"Cache unlink error: {e}")
+            return 0
+
+    async def delete_indexed(self, *indexes: str, keys=()) -> int:
+        """Delete all keys recorded in index sets, plus explicit keys"""
         if not self.enabled:
             return 0
 
         try:
-            keys = await self.redis.keys(pattern)
-            if keys:
-                return await self.redis.delete(*keys)
+            pipe = self.redis.pipeline(transaction=False)
+            for index in indexes:
+                pipe.smembers(index)
+            members = await pipe.execute() if indexes else []
+
+            targets = set(keys).union(indexes, *members)
+            if targets:
+                return await self.redis.unlink(*targets)
             return 0
         except Exception as e:
-            logger.error(f"Cache delete error: {e}")
+            logger.error(f"Cache indexed delete error: {e}")
             return 0
 
+    @staticmethod
+    def user_index(user_id) -> str:
+        """Index set holding a user's cache keys"""
+        return f"user_cache_keys:{user_id}"
+
     async def invalidate_user_cache(self, user_id: str):
         """Invalidate all cache for user"""
-        await self.delete(f"cache:user:{user_id}:*")
+        await self.delete_indexed(self.user_index(user_id))
 
 
 # Global instance
 cache = CacheManager()
 
 
+# Result handed to coalesced waiters when the caller running the miss was
+# cancelled: they were not, so they retry instead of failing with it
+_RETRY = object()
+
+
 def cached(
     ttl: int = 300,
     key_prefix: str = "",
@@ -128,18 +272,44 @@ def cached(
                 **kwargs
             )
 
-            # Try cache
-            cached_result = await cache.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit: {cache_key}")
-                return cached_result
+            while True:
+                # Try cache
+                cached_result = await cache.get(cache_key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit: {cache_key}")
+                    return cached_result
 
-            # Execute function
-            result = await func(*args, **kwargs)
+                # Coalesce with a miss already running in this process
+                pending = cache.inflight.get(cache_key)
+                if pending is None:
+                    break
+                result = await asyncio.shield(pending)
+                if result is not _RETRY:
+                    return result
+
+            future = asyncio.get_running_loop().create_future()
+            cache.inflight[cache_key] = future
 
-            # Cache result
+            # Execute function
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                # Only this caller was cancelled: wake the waiters so they
+                # run the miss themselves rather than inherit the cancel
+                future.set_result(_RETRY)
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Mark retrieved in case no caller was waiting
+                future.exception()
+                raise
+            finally:
+                cache.inflight.pop(cache_key, None)
+            future.set_result(result)
+
+            # Cache result - SET EX NX, first writer wins on a stampede
             if result is not None:
-                await cache.set(cache_key, result, ttl)
+                await cache.set(cache_key, result, ttl, nx=True)
                 logger.debug(f"Cache set: {cache_key}")
 
             return result
@@ -149,20 +319,33 @@ def cached(
 
 
 class CacheMiddleware:
-    """HTTP response caching middleware"""
+    """HTTP response caching middleware with stale-while-revalidate"""
 
     CACHEABLE_METHODS = {"GET", "HEAD"}
     CACHE_TTL = 60  # 1 minute default
 
-    # Routes to cache
+    # Stale entries are kept (and served while refreshing) for this many
+    # multiples of the fresh TTL before Redis expires them
+    STALE_FACTOR = 10
+
+    # Larger or non-JSON bodies pass through without being buffered
+    MAX_BODY_SIZE = 64 * 1024
+
+    # Routes to cache, matched against the raw ASGI path (with the /api/v1
+    # mount). Health probes are never cached: they must reflect live state.
     CACHE_ROUTES = {
-        "/notes": 60,
-        "/notes/stats": 300,
-        "/health": 10,
+        "/api/v1/notes": 60,
+        "/api/v1/notes/stats": 300,
     }
+    # Longest prefix first so ".../notes/stats" wins over ".../notes"
+    _ROUTES = tuple(
+        sorted(CACHE_ROUTES.items(), key=lambda r: len(r[0]), reverse=True)
+    )
+    _PREFIXES = tuple(prefix for prefix, _ in _ROUTES)
 
     def __init__(self, app):
         self.app = app
+        self._refreshing: dict = {}
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
@@ -171,59 +354,145 @@ class CacheMiddleware:
         request_path = scope.get("path", "")
         request_method = scope.get("method", "")
 
-        # Check if route should be cached
-        should_cache = False
-        ttl = self.CACHE_TTL
-
-        for route_prefix, route_ttl in self.CACHE_ROUTES.items():
-            if request_path.startswith(route_prefix):
-                should_cache = True
-                ttl = route_ttl
-                break
-
-        # Only cache GET/HEAD requests
-        if not (should_cache and request_method in self.CACHEABLE_METHODS):
+        # Only cache GET/HEAD requests on cached routes
+        if (
+            request_method not in self.CACHEABLE_METHODS
+            or not request_path.startswith(self._PREFIXES)
+        ):
             return await self.app(scope, receive, send)
 
-        # Generate cache key
-        cache_key = f"http:{request_method}:{request_path}"
+        ttl = next(
+            route_ttl
+            for route_prefix, route_ttl in self._ROUTES
+            if request_path.startswith(route_prefix)
+        )
+
+        # Generate cache key - scoped to the caller's credentials, since
+        # cached routes return per-user data
+        cache_key = (
+            f"http:{self._credential_digest(scope)}:"
+            f"{request_method}:{request_path}"
+        )
         if scope.get("query_string"):
             cache_key += f"?{scope['query_string'].decode()}"
 
-        # Check cache
-        cached_response = await cache.get(cache_key)
-        if cached_response:
-            logger.debug(f"HTTP cache hit: {cache_key}")
+        # Check cache - "<stale_at>\n<content-type>\n<body>", zstd if large
+        cached = await cache.get_compressed(cache_key)
+        entry = self._parse_entry(cached) if cached else None
+        if entry:
+            stale_at, media_type, body = entry
+            if time.time() < stale_at:
+                logger.debug(f"HTTP cache hit: {cache_key}")
+                state = b"hit"
+            else:
+                logger.debug(f"HTTP cache stale: {cache_key}")
+                state = b"stale"
+                self._schedule_refresh(scope, cache_key, ttl)
+
+            # Send cached body as-is
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", media_type),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"x-cache", state),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
 
-            async def send_cached(message):
-                if message["type"] == "http.response.start":
-                    message["headers"].append((b"x-cache", b"hit"))
-                await send(message)
+        await self._fetch_and_store(scope, receive, send, cache_key, ttl)
 
-            # Send cached response
-            response = JSONResponse(cached_response["body"])
-            await response(scope, receive, send_cached)
-            return
+    @staticmethod
+    def _credential_digest(scope) -> str:
+        """Digest of the Authorization and Cookie headers"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name, value in scope.get("headers", []):
+            if name in (b"authorization", b"cookie"):
+                digest.update(name + b":" + value + b"\n")
+        return digest.hexdigest()
 
-        # Capture response
+    @staticmethod
+    def _parse_entry(data: bytes):
+        """Split a cached entry; None for unknown or legacy formats"""
+        try:
+            stale_at, media_type, body = data.split(b"\n", 2)
+            return float(stale_at), media_type, body
+        except ValueError:
+            return None
+
+    async def _fetch_and_store(self, scope, receive, send, cache_key, ttl):
+        """Run the app, forward the response and cache a small JSON 200"""
         response_body = []
+        media_type = None
 
         async def send_wrapper(message):
-            if message["type"] == "http.response.body":
+            nonlocal response_body, media_type
+            if message["type"] == "http.response.start":
+                media_type = self._cacheable_type(message)
+            elif message["type"] == "http.response.body" and media_type:
                 response_body.append(message.get("body", b""))
+                if sum(map(len, response_body)) > self.MAX_BODY_SIZE:
+                    # Too large to cache - stop buffering
+                    media_type = None
+                    response_body = []
             await send(message)
 
         await self.app(scope, receive, send_wrapper)
 
         # Cache successful responses
-        if response_body:
+        if not (media_type and response_body):
+            return
+        try:
+            stale_at = b"%f" % (time.time() + ttl)
+            entry = b"\n".join(
+                [stale_at, media_type, b"".join(response_body)]
+            )
+            store = (
+                cache.set_compressed
+                if len(entry) > COMPRESS_THRESHOLD
+                else cache.set_raw
+            )
+            await store(cache_key, entry, ttl * self.STALE_FACTOR)
+            logger.debug(f"HTTP cache set: {cache_key}")
+        except Exception as e:
+            logger.error(f"Failed to cache response: {e}")
+
+    def _cacheable_type(self, message) -> Optional[bytes]:
+        """Content type of a 200 JSON response small enough to cache"""
+        if message["status"] != 200:
+            return None
+        headers = dict(message.get("headers", []))
+        media_type = headers.get(b"content-type", b"")
+        if not media_type.startswith(b"application/json"):
+            return None
+        length = headers.get(b"content-length")
+        if length is not None and int(length) > self.MAX_BODY_SIZE:
+            return None
+        return media_type
+
+    def _schedule_refresh(self, scope, cache_key, ttl):
+        """Re-run the request in the background to refresh a stale entry"""
+        if cache_key in self._refreshing:
+            return
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def discard(message):
+            pass
+
+        async def refresh():
             try:
-                body = b"".join(response_body)
-                cache_data = {
-                    "body": json.loads(body.decode()),
-                    "status": 200
-                }
-                await cache.set(cache_key, cache_data, ttl)
-                logger.debug(f"HTTP cache set: {cache_key}")
+                await self._fetch_and_store(
+                    dict(scope), receive, discard, cache_key, ttl
+                )
             except Exception as e:
-                logger.error(f"Failed to cache response: {e}")
+                logger.error(f"HTTP cache refresh failed: {e}")
+            finally:
+                self._refreshing.pop(cache_key, None)
+
+        self._refreshing[cache_key] = asyncio.create_task(refresh())
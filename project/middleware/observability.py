@@ -0,0 +1,108 @@
+"""
+project/middleware/observability.py - Request ID, timing and error capture
+"""
+
+import time
+import os
+import logging
+import traceback
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from project.middleware.performance import SLOW_ENDPOINT_THRESHOLD_NS
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedObservabilityMiddleware:
+    """Assign request IDs, log and time requests, and catch errors"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = os.urandom(16).hex()
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (b"x-request-id", request_id.encode())
+
+        # Above WARNING nothing here is ever logged, so skip the clock
+        timed = logger.isEnabledFor(logging.WARNING)
+        start_ns = time.perf_counter_ns() if timed else 0
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                message["headers"] = [*message.get("headers", ()), header]
+                if not timed:
+                    await send(message)
+                    return
+
+                duration_ns = time.perf_counter_ns() - start_ns
+                slow = duration_ns > SLOW_ENDPOINT_THRESHOLD_NS
+
+                # One record per request, built only if it will be emitted;
+                # a slow request's record is the warning, flagged as such
+                if slow or logger.isEnabledFor(logging.INFO):
+                    client = scope.get("client")
+                    extra = {
+                        "request_id": request_id,
+                        "method": scope.get("method", ""),
+                        "path": scope.get("path", ""),
+                        "client_ip": client[0] if client else None,
+                        "status_code": message["status"],
+                        "duration_ms": round(duration_ns / 1e6, 2),
+                    }
+
+                    if slow:
+                        slow_extra = {
+                            **extra,
+                            "duration_seconds": round(duration_ns / 1e9, 3),
+                            "type": "slow_endpoint",
+                        }
+                        logger.warning(
+                            "Slow endpoint detected",
+                            extra={"extra": slow_extra},
+                        )
+                    else:
+                        logger.info(
+                            "Request completed", extra={"extra": extra}
+                        )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+
+            if isinstance(exc, SQLAlchemyError):
+                log_message = f"Database error: {exc}"
+                error = "Database error occurred"
+            else:
+                log_message = f"Unexpected error: {exc}"
+                error = "An unexpected error occurred"
+
+            logger.error(
+                log_message,
+                extra={
+                    "request_id": request_id,
+                    "traceback": traceback.format_exc(),
+                },
+            )
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={
+                    "success": False,
+                    "error": error,
+                    "request_id": request_id,
+                },
+            )
+            await response(scope, receive, send_wrapper)
@@ -7,54 +7,21 @@ import logging
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
-logger = logging.getLogger(__name__)
-
-# Slow query threshold (seconds)
-SLOW_QUERY_THRESHOLD = 1.0
-SLOW_ENDPOINT_THRESHOLD = 2.0
-
-
-class PerformanceMiddleware:
-    """Track endpoint response times"""
-
-    def __init__(self, app):
-        self.app = app
-
-    async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
-
-        start_time = time.time()
+from project.database import engine
 
-        async def send_wrapper(message):
-            if message["type"] == "http.response.start":
-                duration = time.time() - start_time
-
-                # Log slow endpoints
-                if duration > SLOW_ENDPOINT_THRESHOLD:
-                    path = scope.get("path", "")
-                    method = scope.get("method", "")
-
-                    extra = {
-                        "method": method,
-                        "path": path,
-                        "duration_seconds": round(duration, 3),
-                        "type": "slow_endpoint",
-                    }
-
-                    if "state" in scope and hasattr(
-                        scope["state"], "request_id"
-                    ):
-                        extra["request_id"] = scope["state"].request_id
+logger = logging.getLogger(__name__)
 
-                    logger.warning(
-                        "Slow endpoint detected", extra={"extra": extra}
-                    )
+# Slow thresholds (monotonic nanoseconds)
+SLOW_QUERY_THRESHOLD_NS = 1_000_000_000
+SLOW_ENDPOINT_THRESHOLD_NS = 2_000_000_000
+QUERY_PREVIEW_LEN = 200
 
-            await send(message)
 
-        await self.app(scope, receive, send_wrapper)
+def _preview(statement: str) -> str:
+    """Truncate long statements, copying only the kept prefix"""
+    if len(statement) <= QUERY_PREVIEW_LEN:
+        return statement
+    return f"{statement[:QUERY_PREVIEW_LEN]}..."
 
 
 # SQL query monitoring
@@ -62,24 +29,20 @@ class PerformanceMiddleware:
 def before_cursor_execute(
     conn, cursor, statement, parameters, context, executemany
 ):
-    conn.info.setdefault("query_start_time", []).append(time.time())
+    # Cursor execution is serialized per connection, so one slot suffices
+    conn.info["query_start_ns"] = time.perf_counter_ns()
 
 
 @event.listens_for(Engine, "after_cursor_execute")
 def after_cursor_execute(
     conn, cursor, statement, parameters, context, executemany
 ):
-    total = time.time() - conn.info["query_start_time"].pop(-1)
-
-    if total > SLOW_QUERY_THRESHOLD:
-        # Truncate long queries
-        query_preview = (
-            statement[:200] + "..." if len(statement) > 200 else statement
-        )
+    total_ns = time.perf_counter_ns() - conn.info["query_start_ns"]
 
+    if total_ns > SLOW_QUERY_THRESHOLD_NS:
         extra = {
-            "duration_seconds": round(total, 3),
-            "query": query_preview,
+            "duration_seconds": round(total_ns / 1e9, 3),
+            "query": _preview(statement),
             "type": "slow_query",
         }
 
@@ -88,13 +51,14 @@ def after_cursor_execute(
 
 def get_db_pool_stats():
     """Get database connection pool statistics"""
-    from project.database import engine
-
+    # Read engine.pool per call: engine.dispose() swaps in a new pool
     pool = engine.pool
+    size = pool.size()
+    overflow = pool.overflow()
     return {
-        "size": pool.size(),
+        "size": size,
         "checked_in": pool.checkedin(),
         "checked_out": pool.checkedout(),
-        "overflow": pool.overflow(),
-        "total": pool.size() + pool.overflow(),
+        "overflow": overflow,
+        "total": size + overflow,
     }
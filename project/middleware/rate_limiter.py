@@ -2,43 +2,109 @@
 companion/project/middleware/rate_limitter.py
 """
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+import orjson
+import hashlib
+import logging
 import time
-import redis
-from typing import Dict
+import uuid
+import redis.asyncio as aioredis
+from redis.exceptions import NoScriptError
+from typing import Dict, Optional
 from project.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Trim, count and record in one atomic round trip; returns {allowed, count}
+_SLIDING_WINDOW_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1] - ARGV[2] * 1000)
+local c = redis.call('ZCARD', KEYS[1])
+if c >= tonumber(ARGV[3]) then
+    return {0, c}
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1] .. ':' .. ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2] + 10)
+return {1, c + 1}
+"""
+
+# One integer key per client per window; expiry set on first hit only
+_FIXED_WINDOW_LUA = """
+local v = redis.call('INCR', KEYS[1])
+if v == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return v
+"""
+
+
+def _script_sha(script: str) -> str:
+    """SHA1 Redis uses for EVALSHA, computed without a round trip"""
+    return hashlib.sha1(script.encode()).hexdigest()
+
 
 class RateLimiter:
     def __init__(self):
+        # No Redis I/O here: from_url is lazy, and a Redis that is not up
+        # yet at import must not pin the limiter to memory. Scripts are
+        # loaded on first NoScriptError instead.
         try:
-            self.redis = redis.from_url(settings.CELERY_BROKER_URL)
+            self.redis = aioredis.from_url(settings.CELERY_BROKER_URL)
+            self._sha = _script_sha(_SLIDING_WINDOW_LUA)
+            self._fixed_sha = _script_sha(_FIXED_WINDOW_LUA)
             self.storage = "redis"
         except Exception as e:
-            print("Error: ", e)
+            logger.warning("Rate limiter using memory storage: %s", e)
             self.memory: Dict[str, list] = {}
             self.storage = "memory"
 
-    def is_allowed(
-        self, key: str, limit: int = 100, window: int = 3600
+    async def is_allowed(
+        self,
+        key: str,
+        limit: int = 100,
+        window: int = 3600,
+        rolling: bool = False,
+    ) -> bool:
+        if self.storage != "redis":
+            return self._memory_check(key, limit, window)
+        if rolling:
+            return await self._redis_check(key, limit, window)
+        return await self._redis_check_fixed(key, limit, window)
+
+    async def _redis_check_fixed(
+        self, key: str, limit: int, window: int
     ) -> bool:
-        if self.storage == "redis":
-            return self._redis_check(key, limit, window)
-        return self._memory_check(key, limit, window)
+        bucket = f"{key}:{int(time.time() // window)}"
+        try:
+            try:
+                count = await self.redis.evalsha(
+                    self._fixed_sha, 1, bucket, window
+                )
+            except NoScriptError:
+                self._fixed_sha = await self.redis.script_load(
+                    _FIXED_WINDOW_LUA
+                )
+                count = await self.redis.evalsha(
+                    self._fixed_sha, 1, bucket, window
+                )
+            return count <= limit
+        except Exception as e:
+            logger.warning("Rate limit check failed open: %s", e)
+            return True  # Fail open
 
-    def _redis_check(self, key: str, limit: int, window: int) -> bool:
+    async def _redis_check(self, key: str, limit: int, window: int) -> bool:
+        # Integer millisecond scores keep the RESP payload small
+        now_ms = int(time.time() * 1000)
+        args = (key, now_ms, window, limit, uuid.uuid4().hex)
         try:
-            pipe = self.redis.pipeline()
-            now = time.time()
-            pipe.zremrangebyscore(key, 0, now - window)
-            pipe.zcard(key)
-            pipe.zadd(key, {str(now): now})
-            pipe.expire(key, window)
-            results = pipe.execute()
-            return results[1] < limit
+            try:
+                allowed, _ = await self.redis.evalsha(self._sha, 1, *args)
+            except NoScriptError:
+                # Script not cached yet (first use, restart); load once
+                self._sha = await self.redis.script_load(_SLIDING_WINDOW_LUA)
+                allowed, _ = await self.redis.evalsha(self._sha, 1, *args)
+            return allowed == 1
         except Exception as e:
-            print("Error: ", e)
+            logger.warning("Rate limit check failed open: %s", e)
             return True  # Fail open
 
     def _memory_check(self, key: str, limit: int, window: int) -> bool:
@@ -57,33 +123,47 @@ class RateLimiter:
         return True
 
 
-# Global instance
-limiter = RateLimiter()
+# Limits per endpoint prefix: (requests, window seconds). Matched
+# against the raw ASGI path, so routes carry their /api/v1 mount.
+RATE_LIMITS = {
+    "/api/v1/auth/login": (5, 300),  # 5 per 5 minutes
+    "/api/v1/auth/register": (3, 3600),  # 3 per hour
+    "/api/v1/auth": (50, 3600),  # 50 per hour
+}
+DEFAULT_LIMIT = (1000, 3600)
+# Longest prefix first so ".../auth/login" wins over ".../auth"
+_LIMIT_RULES = tuple(
+    sorted(RATE_LIMITS.items(), key=lambda r: len(r[0]), reverse=True)
+)
+_LIMIT_PREFIXES = tuple(prefix for prefix, _ in _LIMIT_RULES)
+
+# Buckets that need true rolling-window precision (brute-force targets)
+ROLLING_WINDOW_PATHS = ("/api/v1/auth/login",)
 
+# Deny body is constant, so encode it once
+_RATE_LIMITED_BODY = orjson.dumps({"error": "Rate limit exceeded"})
 
-async def rate_limit_middleware(request: Request, call_next):
-    client_ip = request.client.host
+# Global instance
+limiter = RateLimiter()
 
-    # Define limits per endpoint
-    limits = {
-        "/auth/login": (5, 300),  # 5 per 5 minutes
-        "/auth/register": (3, 3600),  # 3 per hour
-        "/auth": (50, 3600),  # 50 per hour
-    }
 
-    path = request.url.path
-    limit, window = limits.get("default", (1000, 3600))
+async def rate_limit_check(client_ip: str, path: str) -> Optional[Response]:
+    """Return a 429 response if the client is over its limit"""
+    limit, window = DEFAULT_LIMIT
 
-    for pattern, (l, w) in limits.items():
-        if path.startswith(pattern):
-            limit, window = l, w
-            break
+    if path.startswith(_LIMIT_PREFIXES):
+        limit, window = next(
+            rule for prefix, rule in _LIMIT_RULES if path.startswith(prefix)
+        )
 
-    if not limiter.is_allowed(f"rate:{client_ip}:{path}", limit, window):
-        return JSONResponse(
+    rolling = path.startswith(ROLLING_WINDOW_PATHS)
+    if not await limiter.is_allowed(
+        f"rate:{client_ip}:{path}", limit, window, rolling
+    ):
+        return Response(
+            content=_RATE_LIMITED_BODY,
             status_code=429,
-            content={"error": "Rate limit exceeded"},
+            media_type="application/json",
             headers={"Retry-After": str(window)},
         )
-
-    return await call_next(request)
+    return None
@@ -0,0 +1,48 @@
+"""
+project/middleware/security.py
+
+Throttling, rate limiting and input validation in one ASGI pass
+"""
+
+from project.middleware.rate_limiter import rate_limit_check
+from project.middleware.throttler import throttle_check
+from project.middleware.validation import validation_check
+
+
+class SecurityMiddleware:
+    """Run request guards off the raw scope before reaching the app"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        path = scope["path"]
+
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                content_length = value.decode("latin-1")
+                break
+
+        # Redis-backed guards are awaited so no round trip blocks the loop
+        response = (
+            await throttle_check(client_ip, path)
+            or await rate_limit_check(client_ip, path)
+            or validation_check(
+                scope["method"],
+                path,
+                scope.get("query_string", b"").decode("latin-1"),
+                content_length,
+            )
+        )
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -2,13 +2,42 @@
 companion/project/middleware/throttler.py
 """
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+import hashlib
+import math
+import orjson
+import logging
 import time
-from typing import Dict
+import redis.asyncio as aioredis
+from collections import OrderedDict
+from typing import Optional
+from redis.exceptions import NoScriptError
+from project.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Refill and take one token atomically; ARGV: capacity, rate/s, ttl, now_ms
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local now = tonumber(ARGV[4])
+local d = redis.call('HMGET', KEYS[1], 't', 'l')
+local t = tonumber(d[1]) or capacity
+local l = tonumber(d[2]) or now
+t = math.min(capacity, t + (now - l) * tonumber(ARGV[2]) / 1000)
+local allowed = 0
+if t >= 1 then
+    t = t - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', t, 'l', now)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return allowed
+"""
 
 
 class TokenBucket:
+    __slots__ = ("capacity", "tokens", "refill_rate", "last_refill")
+
     def __init__(self, capacity: int = 10, refill_rate: float = 1.0):
         self.capacity = capacity
         self.tokens = float(capacity)
@@ -31,43 +60,91 @@ class TokenBucket:
 
 
 class Throttler:
+    # Least recently used buckets are evicted past this size; an evicted
+    # bucket would have refilled anyway unless the client is very active
+    MAX_BUCKETS = 100_000
+
     def __init__(self):
-        self.buckets: Dict[str, TokenBucket] = {}
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Lazy client and a locally computed SHA: no Redis I/O at import,
+        # the script is loaded on first NoScriptError
+        try:
+            self.redis = aioredis.from_url(settings.CELERY_BROKER_URL)
+            self._sha = hashlib.sha1(_TOKEN_BUCKET_LUA.encode()).hexdigest()
+            self.storage = "redis"
+        except Exception as e:
+            logger.warning("Throttler using memory storage: %s", e)
+            self.storage = "memory"
+
+    async def consume(self, key: str, capacity: int, rate: float) -> bool:
+        """Take one token, shared across workers when Redis is up"""
+        if self.storage == "redis":
+            try:
+                return await self._redis_consume(key, capacity, rate)
+            except Exception as e:
+                logger.warning("Redis throttle failed, using memory: %s", e)
+        return self.get_bucket(key, capacity, rate).consume()
+
+    async def _redis_consume(
+        self, key: str, capacity: int, rate: float
+    ) -> bool:
+        # Idle buckets expire once they would have refilled completely
+        ttl = math.ceil(capacity / rate) + 1 if rate > 0 else 3600
+        args = (key, capacity, rate, ttl, int(time.time() * 1000))
+        try:
+            return await self.redis.evalsha(self._sha, 1, *args) == 1
+        except NoScriptError:
+            self._sha = await self.redis.script_load(_TOKEN_BUCKET_LUA)
+            return await self.redis.evalsha(self._sha, 1, *args) == 1
 
     def get_bucket(
         self, key: str, capacity: int = 10, rate: float = 1.0
     ) -> TokenBucket:
-        if key not in self.buckets:
-            self.buckets[key] = TokenBucket(capacity, rate)
-        return self.buckets[key]
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(capacity, rate)
+            if len(self.buckets) > self.MAX_BUCKETS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
 
 
-# Global instance
-throttler = Throttler()
+# Throttling per endpoint (exact raw path, including the /api/v1 mount):
+# (capacity, refill per second)
+THROTTLE_CONFIGS = {
+    "/api/v1/users/transaction_celery": (3, 0.1),  # 1 per 10 seconds
+    "/api/v1/users/subscribe": (5, 0.2),  # 5 capacity, 1 per 5 seconds
+}
+DEFAULT_THROTTLE = (50, 5.0)  # 50 capacity, 5 per second
 
 
-async def throttle_middleware(request: Request, call_next):
-    client_ip = request.client.host
-    path = request.url.path
+def _throttled_response_parts(rate: float):
+    delay = 1.0 / rate if rate > 0 else 5.0
+    body = orjson.dumps({"error": "Request throttled", "retry_after": delay})
+    return body, {"Retry-After": str(int(delay))}
 
-    # Define throttling per endpoint
-    configs = {
-        "/users/transaction_celery": (3, 0.1),  # 3 capacity, 1 per 10 seconds
-        "/users/subscribe": (5, 0.2),  # 5 capacity, 1 per 5 seconds
-        "default": (50, 5.0),  # 50 capacity, 5 per second
-    }
 
-    capacity, rate = configs.get(path, configs["default"])
-    bucket = throttler.get_bucket(
-        f"throttle:{client_ip}:{path}", capacity, rate
-    )
+# Deny bodies per refill rate, encoded once
+_THROTTLED = {
+    rate: _throttled_response_parts(rate)
+    for _, rate in (*THROTTLE_CONFIGS.values(), DEFAULT_THROTTLE)
+}
 
-    if not bucket.consume():
-        delay = 1.0 / rate if rate > 0 else 5.0
-        return JSONResponse(
+# Global instance
+throttler = Throttler()
+
+
+async def throttle_check(client_ip: str, path: str) -> Optional[Response]:
+    """Return a 429 response if the client's token bucket is empty"""
+    capacity, rate = THROTTLE_CONFIGS.get(path, DEFAULT_THROTTLE)
+    key = f"throttle:{client_ip}:{path}"
+    if not await throttler.consume(key, capacity, rate):
+        body, headers = _THROTTLED[rate]
+        return Response(
+            content=body,
             status_code=429,
-            content={"error": "Request throttled", "retry_after": delay},
-            headers={"Retry-After": str(int(delay))},
+            media_type="application/json",
+            headers=headers,
         )
-
-    return await call_next(request)
+    return None
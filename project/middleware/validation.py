@@ -1,26 +1,38 @@
 """
 project/middleware/validation.py
 
-Input validation and sanitization middleware
+Input validation and sanitization
 """
 
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
 import re
 import html
+from functools import lru_cache
+from typing import Optional
+
+
+MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB
+SUSPICIOUS_PATTERNS = (
+    r"<script[^>]*>.*?</script>",  # XSS
+    r"javascript:",
+    r"data:text/html",
+    r"vbscript:",
+    r"onload\s*=",
+    r"onerror\s*=",
+)
+# One fused pattern so each check walks the string once
+_SUSPICIOUS_RE = re.compile(
+    "|".join(f"(?:{p})" for p in SUSPICIOUS_PATTERNS),
+    re.IGNORECASE | re.DOTALL,
+)
 
 
 class InputValidator:
-    def __init__(self):
-        self.max_request_size = 10 * 1024 * 1024  # 10MB
-        self.suspicious_patterns = [
-            r"<script[^>]*>.*?</script>",  # XSS
-            r"javascript:",
-            r"data:text/html",
-            r"vbscript:",
-            r"onload\s*=",
-            r"onerror\s*=",
-        ]
+    __slots__ = ()
+
+    max_request_size = MAX_REQUEST_SIZE
+    suspicious_patterns = SUSPICIOUS_PATTERNS
 
     def sanitize_string(self, value: str) -> str:
         """Basic HTML escaping"""
@@ -28,31 +40,47 @@ class InputValidator:
 
     def check_suspicious_content(self, content: str) -> bool:
         """Check for suspicious patterns"""
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
+        return _SUSPICIOUS_RE.search(content) is not None
 
 
 validator = InputValidator()
 
+# Read-only endpoints whose URLs are never reflected into content; API
+# routes are mounted under /api/v1, the docs are served at the root
+SCAN_EXEMPT_PREFIXES = (
+    "/api/v1/monitoring/",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+)
+
+
+@lru_cache(maxsize=4096)
+def _url_is_suspicious(url: str) -> bool:
+    """Memoized URL scan so recurring URLs skip the regex"""
+    return _SUSPICIOUS_RE.search(url) is not None
+
 
-async def validation_middleware(request: Request, call_next):
-    """Input validation middleware"""
+def validation_check(
+    method: str, path: str, query: str, content_length: Optional[str]
+) -> Optional[JSONResponse]:
+    """Return an error response for oversized or suspicious requests"""
 
     # Check request size
-    content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > validator.max_request_size:
+    if content_length and int(content_length) > MAX_REQUEST_SIZE:
         return JSONResponse(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             content={"error": "Request too large"},
         )
 
-    # Check for suspicious patterns in URL
-    if validator.check_suspicious_content(str(request.url)):
+    # Check for suspicious patterns in URL path and query
+    exempt = method == "GET" and path.startswith(SCAN_EXEMPT_PREFIXES)
+    if not exempt and (
+        _url_is_suspicious(path) or (query and _url_is_suspicious(query))
+    ):
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": "Suspicious request detected"},
         )
 
-    return await call_next(request)
+    return None
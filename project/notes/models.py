@@ -14,6 +14,8 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     Integer,
+    Computed,
+    func,
 )
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
@@ -22,6 +24,13 @@ from uuid import UUID
 if TYPE_CHECKING:
     from project.auth.models import User
 
+# Whitespace-separated word count, matching len(content.split())
+WORDS_COUNT_SQL = (
+    r"CASE WHEN content ~ '^\s*$' THEN 0 ELSE array_length("
+    r"regexp_split_to_array(regexp_replace(content, '^\s+|\s+$', '', 'g'), "
+    r"'\s+'), 1) END"
+)
+
 
 class Note(Base):
     __tablename__ = "notes"
@@ -36,7 +45,9 @@ class Note(Base):
 
     # Metadata
     tags: Mapped[List[str]] = mapped_column(JSON, default=list)
-    words_count: Mapped[int] = mapped_column(Integer, default=0)
+    words_count: Mapped[int] = mapped_column(
+        Integer, Computed(WORDS_COUNT_SQL, persisted=True)
+    )
 
     # AI Enhancement fields
     ai_summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -48,12 +59,13 @@ class Note(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
+        # Naive column: take now() in UTC to match the Python defaults,
+        # whatever the session TimeZone is
+        onupdate=func.timezone("UTC", func.now()),
     )
 
     # Relationships
@@ -76,10 +88,6 @@ class Note(Base):
         "NoteSummary", back_populates="note", cascade="all, delete-orphan"
     )
 
-    def update_word_count(self) -> None:
-        """Update word count based on current content"""
-        self.words_count = len(self.content.split()) if self.content else 0
-
     def __repr__(self) -> str:
         return f"<Note(id={self.id}, title='{self.title[:30]}...')>"
 
@@ -1,34 +1,33 @@
 """Notes schemas - Compatible with success_response"""
 
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Literal, Optional, Dict
 from datetime import datetime
 
+# Enum-like fields, shared by schemas and query params
+ContentType = Literal["text", "markdown", "html"]
+SortField = Literal["created_at", "updated_at", "title"]
+SortOrder = Literal["asc", "desc"]
+
 
 # Request Schemas
 class NoteCreate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     title: str = Field(..., min_length=1, max_length=255)
     content: str = Field(..., min_length=1)
-    content_type: str = Field(default="text", pattern="^(text|markdown|html)$")
+    content_type: ContentType = "text"
     tags: Optional[List[str]] = Field(default_factory=list)
 
-    @field_validator("title", "content")
-    @classmethod
-    def strip_whitespace(cls, v):
-        return v.strip() if v else v
-
 
 class NoteUpdate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     content: Optional[str] = Field(None, min_length=1)
-    content_type: Optional[str] = Field(None, pattern="^(text|markdown|html)$")
+    content_type: Optional[ContentType] = None
     tags: Optional[List[str]] = None
 
-    @field_validator("title", "content")
-    @classmethod
-    def strip_whitespace(cls, v):
-        return v.strip() if v else v
-
 
 # Response Schemas (Data only, no wrapper)
 class NoteResponse(BaseModel):
@@ -44,25 +43,16 @@ class NoteResponse(BaseModel):
     updated_at: datetime
 
 
-class NoteStatsResponse(BaseModel):
-    total_notes: int
-    total_words: int
-    content_types: dict
-    unique_tags: List[str]
-    tags_count: int
-
-
 # Query Params
 class NoteQueryParams(BaseModel):
     search: Optional[str] = None
     tags: Optional[List[str]] = None
-    content_type: Optional[str] = None
+    content_type: Optional[ContentType] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=20, ge=1, le=100)
-    sort_by: str = Field(
-        default="created_at", pattern="^(created_at|updated_at|title)$"
-    )
-    sort_order: str = Field(default="desc", pattern="^(asc|desc)$")
+    sort_by: SortField = "created_at"
+    sort_order: SortOrder = "desc"
+    cursor: Optional[str] = None
 
 
 class EnhancedNoteResponse(BaseModel):
@@ -88,25 +78,10 @@ class QuestionCreate(BaseModel):
     question_text: str
 
 
-class QuizQuestionResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
-    question_text: str
-    options: List[str]
-
-
-class QuizResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
-    questions: List[QuizQuestionResponse]
-    created_at: datetime
-
-
 class QuizAnswerSubmit(BaseModel):
     quiz_id: int
-    answers: Dict[int, str]
+    # Keyed by question id as sent in JSON; str keys skip int coercion
+    answers: Dict[str, str]
 
 
 class QuizResultDetail(BaseModel):
@@ -121,17 +96,6 @@ class QuizSubmitResponse(BaseModel):
     results: Dict[int, QuizResultDetail]
 
 
-class QuizResultItem(BaseModel):
-    question_id: int
-    is_correct: bool
-
-
-class QuizResultResponse(BaseModel):
-    correct_count: int
-    total_count: int
-    results: List[QuizResultItem]
-
-
 class QuizQuestionData(BaseModel):
     question_id: int
     question: str
@@ -1,12 +1,30 @@
 """Production-optimized Notes Service with maximum performance"""
 
+import base64
+import json
 import logging
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
-from sqlalchemy import select, func, and_, or_, exists, case
-from sqlalchemy.orm import Session, selectinload, load_only
+from sqlalchemy import (
+    Row,
+    select,
+    insert,
+    update,
+    func,
+    and_,
+    or_,
+    exists,
+    case,
+    cast,
+    literal,
+    bindparam,
+    String,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, selectinload, load_only, raiseload
 
 from project.notes.models import (
     Note,
@@ -14,6 +32,7 @@ from project.notes.models import (
     EnhancedNote,
     Question,
     Quiz,
+    QuizQuestion,
     QuizSubmission,
 )
 from project.notes.schemas import NoteCreate, NoteUpdate, NoteQueryParams
@@ -21,6 +40,42 @@ from project.notes.schemas import NoteCreate, NoteUpdate, NoteQueryParams
 logger = logging.getLogger(__name__)
 
 
+def _encode_cursor(sort_value: Any, note_id: int) -> str:
+    """Opaque keyset cursor from the last row's (sort value, id)"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, note_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """Decode cursor back into (sort value, id)"""
+    try:
+        sort_value, note_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if sort_by != "title":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(note_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# List filters as one fixed clause: an unset filter binds NULL and its
+# IS NULL arm short-circuits, so every request shares one compiled SQL
+_search = bindparam("search", type_=String)
+_content_type = bindparam("content_type", type_=String)
+_tags = bindparam("tags", type_=JSONB(none_as_null=True))
+NOTE_LIST_FILTERS = and_(
+    or_(
+        _search.is_(None),
+        Note.title.ilike(_search),
+        Note.content.ilike(_search),
+    ),
+    or_(_content_type.is_(None), Note.content_type == _content_type),
+    # One jsonb @> covering every tag, served by ix_notes_tags_jsonb
+    or_(_tags.is_(None), cast(Note.tags, JSONB).contains(_tags)),
+)
+
+
 class NoteService:
     """High-performance note service with optimized queries"""
 
@@ -38,12 +93,11 @@ class NoteService:
             content=note_data.content,
             content_type=note_data.content_type,
             tags=note_data.tags,
-            words_count=len(note_data.content.split()),
         )
 
+        # Commit flushes and assigns the ID; with expire_on_commit off the
+        # instance stays loaded, so no refresh SELECT is needed
         self.db.add(note)
-        self.db.flush()  # Get ID without commit
-        self.db.refresh(note)
         self.db.commit()
         return note
 
@@ -54,7 +108,6 @@ class NoteService:
         notes = [
             Note(
                 user_id=user_id,
-                words_count=len(data.get("content", "").split()),
                 **data,
             )
             for data in notes_data
@@ -81,67 +134,130 @@ class NoteService:
                 selectinload(Note.quizzes),
                 selectinload(Note.summaries),
             )
+        else:
+            # Relationships must be asked for; a lazy load here is an N+1
+            query = query.options(raiseload("*"))
 
         return self.db.scalars(query).first()
 
     def get_user_notes(
-        self, user_id: UUID, query_params: NoteQueryParams
-    ) -> Tuple[List[Note], int]:
-        """Optimized paginated query with window function for count"""
-
-        # Base query with selective loading
-        base_query = select(Note).where(Note.user_id == user_id)
-
-        # Apply filters
-        if query_params.search:
-            search = f"%{query_params.search}%"
-            base_query = base_query.where(
-                or_(Note.title.ilike(search), Note.content.ilike(search))
-            )
-
-        if query_params.content_type:
-            base_query = base_query.where(
-                Note.content_type == query_params.content_type
-            )
-
-        if query_params.tags:
-            for tag in query_params.tags:
-                base_query = base_query.where(Note.tags.contains([tag]))
-
-        # Get total count efficiently
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total = self.db.scalar(count_query)
+        self,
+        user_id: UUID,
+        query_params: NoteQueryParams,
+        known_total: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """List notes; keyset-paginated when a cursor is given"""
+
+        # Base query with the fixed filter clause; values go in as params
+        base_query = select(Note).where(
+            Note.user_id == user_id, NOTE_LIST_FILTERS
+        )
+        params = {
+            "search": (
+                f"%{query_params.search}%" if query_params.search else None
+            ),
+            "content_type": query_params.content_type,
+            "tags": query_params.tags or None,
+        }
 
-        # Apply sorting
+        # Apply sorting, id breaks ties so the keyset is unique
         sort_col = getattr(Note, query_params.sort_by)
-        base_query = base_query.order_by(
-            sort_col.desc()
-            if query_params.sort_order == "desc"
-            else sort_col.asc()
-        )
+        if query_params.sort_order == "desc":
+            base_query = base_query.order_by(sort_col.desc(), Note.id.desc())
+        else:
+            base_query = base_query.order_by(sort_col.asc(), Note.id.asc())
 
-        # Load only needed columns for list view
+        # Load only the columns NoteResponse reads. Touching any other
+        # column or relationship raises instead of lazy-loading per row.
         base_query = base_query.options(
             load_only(
                 Note.id,
                 Note.title,
+                Note.content,
                 Note.content_type,
                 Note.words_count,
                 Note.created_at,
                 Note.updated_at,
                 Note.tags,
-            )
+                raiseload=True,
+            ),
+            raiseload("*"),
         )
 
-        # Paginate
-        offset = (query_params.page - 1) * query_params.page_size
-        notes = list(
-            self.db.scalars(
-                base_query.offset(offset).limit(query_params.page_size)
+        page_size = query_params.page_size
+        if query_params.cursor:
+            # Seek past the cursor via ix_notes_user_sort_id; depth costs
+            # nothing and only an already-cached total is reported
+            sort_value, last_id = _decode_cursor(
+                query_params.cursor, query_params.sort_by
+            )
+            keyset = tuple_(sort_col, Note.id)
+            seek_query = base_query.where(
+                keyset < (sort_value, last_id)
+                if query_params.sort_order == "desc"
+                else keyset > (sort_value, last_id)
             )
-        )
 
-        return notes, total
+            # One extra row tells us whether another page exists
+            notes = list(
+                self.db.scalars(seek_query.limit(page_size + 1), params)
+            )
+            has_more = len(notes) > page_size
+            notes = notes[:page_size]
+            total = known_total
+        else:
+            offset = (query_params.page - 1) * page_size
+            count_query = (
+                select(func.count())
+                .select_from(Note)
+                .where(Note.user_id == user_id, NOTE_LIST_FILTERS)
+            )
+            windowed = known_total is None and bool(
+                query_params.search or query_params.tags
+            )
+
+            if windowed:
+                # Selective filters: the window counts the rows the page
+                # scan already filtered, saving a second round trip
+                rows = self.db.execute(
+                    base_query.add_columns(func.count().over().label("total"))
+                    .offset(offset)
+                    .limit(page_size),
+                    params,
+                ).all()
+                notes = [row.Note for row in rows]
+                if rows:
+                    total = rows[0].total
+                elif offset:
+                    # Past the last page the window has no rows to report
+                    total = self.db.scalar(count_query, params)
+                else:
+                    total = 0
+            else:
+                # Cached total, or a broad list whose dedicated COUNT off
+                # the user_id index is cheaper than windowing every row
+                total = known_total
+                if total is None:
+                    total = self.db.scalar(count_query, params)
+                notes = list(
+                    self.db.scalars(
+                        base_query.offset(offset).limit(page_size), params
+                    )
+                )
+            has_more = offset + len(notes) < total
+
+        # A cursor from any page lets the client continue in keyset mode
+        next_cursor = None
+        if has_more:
+            last = notes[-1]
+            next_cursor = _encode_cursor(getattr(last, sort_col.key), last.id)
+
+        return {
+            "notes": notes,
+            "total_count": total,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
 
     def get_user_notes_stats(self, user_id: UUID) -> dict:
         """Single optimized query for all stats"""
@@ -149,30 +265,42 @@ class NoteService:
         # Aggregate stats in one query
         result = self.db.execute(
             select(
-                func.count(Note.id).label("total_notes"),
+                # count(*) rather than count(id): no per-row NULL check,
+                # and FILTER buckets skip the CASE evaluation
+                func.count().label("total_notes"),
                 func.coalesce(func.sum(Note.words_count), 0).label(
                     "total_words"
                 ),
-                func.count(case((Note.content_type == "text", 1))).label(
-                    "text"
-                ),
-                func.count(case((Note.content_type == "markdown", 1))).label(
-                    "markdown"
-                ),
-                func.count(case((Note.content_type == "html", 1))).label(
-                    "html"
-                ),
+                func.count()
+                .filter(Note.content_type == "text")
+                .label("text"),
+                func.count()
+                .filter(Note.content_type == "markdown")
+                .label("markdown"),
+                func.count()
+                .filter(Note.content_type == "html")
+                .label("html"),
             ).where(Note.user_id == user_id)
         ).first()
 
-        # Get unique tags efficiently
-        tags_result = self.db.execute(
-            select(
-                func.array_agg(func.distinct(func.unnest(Note.tags)))
-            ).where(and_(Note.user_id == user_id, Note.tags.isnot(None)))
-        ).scalar()
-
-        unique_tags = sorted(tags_result) if tags_result else []
+        # Distinct tags, expanded and sorted in SQL. "tags": null is
+        # stored as JSON 'null', not SQL NULL, and would make the expansion
+        # raise, so only real arrays are expanded
+        tag = func.json_array_elements_text(Note.tags).column_valued("tag")
+        unique_tags = list(
+            self.db.scalars(
+                select(tag)
+                .select_from(Note)
+                .where(
+                    and_(
+                        Note.user_id == user_id,
+                        func.json_typeof(Note.tags) == "array",
+                    )
+                )
+                .distinct()
+                .order_by(tag)
+            )
+        )
 
         return {
             "total_notes": result.total_notes or 0,
@@ -243,40 +371,23 @@ class NoteService:
     def get_note_meta_optimized(
         self, note_id: int, user_id: UUID
     ) -> Optional[dict]:
-        """Ultra-fast metadata with EXISTS subqueries"""
+        """Ultra-fast metadata: one count per child table, in one query"""
+
+        def child_count(model):
+            return (
+                select(func.count())
+                .where(model.note_id == note_id)
+                .scalar_subquery()
+            )
 
+        # Each child index is probed once; has_* flags derive from counts
         result = self.db.execute(
             select(
                 Note.id,
-                exists(select(1).where(EnhancedNote.note_id == note_id)).label(
-                    "has_enhanced"
-                ),
-                exists(select(1).where(Quiz.note_id == note_id)).label(
-                    "has_quiz"
-                ),
-                exists(select(1).where(Question.note_id == note_id)).label(
-                    "has_question"
-                ),
-                exists(select(1).where(NoteSummary.note_id == note_id)).label(
-                    "has_summary"
-                ),
-                # Get counts in same query
-                select(func.count(EnhancedNote.id))
-                .where(EnhancedNote.note_id == note_id)
-                .scalar_subquery()
-                .label("enhanced_count"),
-                select(func.count(Quiz.id))
-                .where(Quiz.note_id == note_id)
-                .scalar_subquery()
-                .label("quiz_count"),
-                select(func.count(Question.id))
-                .where(Question.note_id == note_id)
-                .scalar_subquery()
-                .label("question_count"),
-                select(func.count(NoteSummary.id))
-                .where(NoteSummary.note_id == note_id)
-                .scalar_subquery()
-                .label("summary_count"),
+                child_count(EnhancedNote).label("enhanced_count"),
+                child_count(Quiz).label("quiz_count"),
+                child_count(Question).label("question_count"),
+                child_count(NoteSummary).label("summary_count"),
             ).where(and_(Note.id == note_id, Note.user_id == user_id))
         ).first()
 
@@ -285,14 +396,14 @@ class NoteService:
 
         return {
             "note_id": result.id,
-            "has_enhanced_note": result.has_enhanced,
-            "has_quiz": result.has_quiz,
-            "has_question": result.has_question,
-            "has_summary": result.has_summary,
-            "enhanced_count": result.enhanced_count or 0,
-            "quiz_count": result.quiz_count or 0,
-            "question_count": result.question_count or 0,
-            "summary_count": result.summary_count or 0,
+            "has_enhanced_note": result.enhanced_count > 0,
+            "has_quiz": result.quiz_count > 0,
+            "has_question": result.question_count > 0,
+            "has_summary": result.summary_count > 0,
+            "enhanced_count": result.enhanced_count,
+            "quiz_count": result.quiz_count,
+            "question_count": result.question_count,
+            "summary_count": result.summary_count,
         }
 
     # ==================== QUIZ ====================
@@ -308,15 +419,61 @@ class NoteService:
 
         return result.scalar_one_or_none()
 
+    def score_quiz(
+        self, quiz_id: int, user_id: UUID, answers: Dict[str, str]
+    ) -> List[Row]:
+        """Score answers in SQL: one (id, note_id, user_answer, is_correct,
+        explanation) row per question, empty if the quiz isn't the user's"""
+        user_answer = cast(literal(answers, JSONB), JSONB)[
+            cast(QuizQuestion.id, String)
+        ].astext
+        is_correct = func.coalesce(
+            user_answer == QuizQuestion.correct_answer, False
+        )
+
+        # Explanations are only fetched for wrong answers
+        return self.db.execute(
+            select(
+                QuizQuestion.id,
+                Quiz.note_id,
+                user_answer.label("user_answer"),
+                is_correct.label("is_correct"),
+                case((is_correct, None), else_=QuizQuestion.explanation).label(
+                    "explanation"
+                ),
+            )
+            .join(Quiz, QuizQuestion.quiz_id == Quiz.id)
+            .join(Note, Quiz.note_id == Note.id)
+            .where(and_(Quiz.id == quiz_id, Note.user_id == user_id))
+            .order_by(QuizQuestion.order)
+        ).all()
+
     def get_note_with_quizzes_and_submissions(
         self, note_id: int, user_id: UUID
     ) -> Optional[Note]:
         """Optimized quiz loading with submissions"""
+        # One selectin per collection, each pruned to the columns the
+        # /quiz response reads; the note itself only needs its id
         result = self.db.execute(
             select(Note)
             .options(
-                selectinload(Note.quizzes).selectinload(Quiz.questions),
-                selectinload(Note.quizzes).selectinload(Quiz.submissions),
+                load_only(Note.id),
+                selectinload(Note.quizzes)
+                .load_only(Quiz.id, Quiz.created_at)
+                .options(
+                    selectinload(Quiz.questions).load_only(
+                        QuizQuestion.id,
+                        QuizQuestion.question_text,
+                        QuizQuestion.options,
+                        QuizQuestion.correct_answer,
+                    ),
+                    selectinload(Quiz.submissions).load_only(
+                        QuizSubmission.score,
+                        QuizSubmission.total,
+                        QuizSubmission.answers,
+                        QuizSubmission.submitted_at,
+                    ),
+                ),
             )
             .where(and_(Note.id == note_id, Note.user_id == user_id))
         )
@@ -325,19 +482,22 @@ class NoteService:
 
     def create_quiz_submission(
         self, quiz_id: int, answers: dict, score: int, total: int
-    ) -> QuizSubmission:
-        """Create submission efficiently"""
-        submission = QuizSubmission(
-            quiz_id=quiz_id,
-            score=score,
-            total=total,
-            answers=answers,
-            submitted_at=datetime.utcnow(),
-        )
+    ) -> Row:
+        """Insert submission, returning (id, submitted_at) in one trip"""
+        row = self.db.execute(
+            insert(QuizSubmission)
+            .values(
+                quiz_id=quiz_id,
+                score=score,
+                total=total,
+                answers=answers,
+                submitted_at=datetime.utcnow(),
+            )
+            .returning(QuizSubmission.id, QuizSubmission.submitted_at)
+        ).one()
 
-        self.db.add(submission)
         self.db.commit()
-        return submission
+        return row
 
     def get_next_version_number(self, note_id: int) -> int:
         """Get next version with single query"""
@@ -361,26 +521,21 @@ class NoteService:
         if not update_data:
             return self.get_note_by_id(note_id, user_id)
 
-        # Update word count if content changed
-        if "content" in update_data:
-            update_data["words_count"] = len(update_data["content"].split())
-
-        update_data["updated_at"] = datetime.utcnow()
-
-        # Execute update
-        stmt = (
-            Note.__table__.update()
+        # One round trip: the ownership check is in the WHERE and the
+        # updated row (new updated_at and words_count) comes back via
+        # RETURNING, so no follow-up SELECT
+        note = self.db.scalars(
+            update(Note)
             .where(and_(Note.id == note_id, Note.user_id == user_id))
             .values(**update_data)
-        )
-
-        result = self.db.execute(stmt)
+            .returning(Note)
+        ).first()
 
-        if result.rowcount == 0:
+        if note is None:
             return None
 
         self.db.commit()
-        return self.get_note_by_id(note_id, user_id)
+        return note
 
     # ==================== DELETE ====================
 
@@ -1,7 +1,11 @@
 """Complete Notes API with comprehensive caching"""
 
-from typing import List, Optional
+import hashlib
+from typing import List, Optional, Union
+
+import orjson
 from fastapi import Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from project.notes import notes_router
@@ -21,34 +25,62 @@ from project.notes.schemas import (
     QuizGenerateResponse,
     NoteSummaryResponse,
     NoteMetaResponse,
+    ContentType,
+    SortField,
+    SortOrder,
 )
 from project.auth.dependencies import get_current_user
 from project.auth.models import User
 from project.database import get_db_session
-from project.schemas.response import success_response
+from project.schemas.response import success_response, envelope_parts
 from project.middleware.cache import cache
 
 
 async def invalidate_note_caches(user_id: str, note_id: int = None):
     """Helper to invalidate all note-related caches"""
-    patterns = [
-        f"notes_list:{user_id}:*",
-        f"notes_stats:{user_id}",
-    ]
+    # User-scoped keys (lists, stats, quizzes) are tracked in the user index
+    keys = []
     if note_id:
-        patterns.extend(
-            [
-                f"note:{note_id}",
-                f"note_meta:{note_id}",
-                f"note_questions:{note_id}",
-                f"note_enhanced:{note_id}",
-                f"note_quizzes:{note_id}",
-                f"note_summaries:{note_id}",
-            ]
-        )
+        keys = [
+            f"note:{user_id}:{note_id}",
+            f"note_meta:{user_id}:{note_id}",
+            f"note_questions:{user_id}:{note_id}",
+            f"note_enhanced:{user_id}:{note_id}",
+            f"note_summaries:{user_id}:{note_id}",
+        ]
+
+    await cache.delete_indexed(cache.user_index(user_id), keys=keys)
+
+
+def _count_cache_key(user_id: str, *filters) -> str:
+    """Per-user key for a filtered total, independent of the page"""
+    tail = ":".join("" if f is None else str(f) for f in filters)
+    digest = hashlib.blake2b(tail.encode(), digest_size=16).hexdigest()
+    return f"notes_count:{user_id}:{digest}"
+
+
+def _json_response(body: Union[str, bytes]) -> Response:
+    """Return a pre-encoded JSON body, skipping FastAPI serialization"""
+    return Response(content=body, media_type="application/json")
+
 
-    for pattern in patterns:
-        await cache.delete(pattern)
+def _encode(data, message: Optional[str] = None) -> bytes:
+    """Encode a success envelope once, for both the cache and the reply"""
+    return orjson.dumps(success_response(data=data, message=message))
+
+
+def _note_response(note) -> NoteResponse:
+    """Build a NoteResponse from a trusted DB row without validation"""
+    return NoteResponse.model_construct(
+        id=note.id,
+        title=note.title,
+        content=note.content,
+        content_type=note.content_type,
+        tags=note.tags,
+        words_count=note.words_count,
+        created_at=note.created_at,
+        updated_at=note.updated_at,
+    )
 
 
 @notes_router.post("/", status_code=status.HTTP_201_CREATED)
@@ -75,13 +107,12 @@ async def create_note(
 async def list_notes(
     search: Optional[str] = Query(None),
     tags: Optional[List[str]] = Query(None),
-    content_type: Optional[str] = Query(None),
-    page: int = Query(1, ge=1),
+    content_type: Optional[ContentType] = Query(None),
+    page: int = Query(1, ge=1, deprecated=True),
     page_size: int = Query(20, ge=1, le=100),
-    sort_by: str = Query(
-        "created_at", pattern="^(created_at|updated_at|title)$"
-    ),
-    sort_order: str = Query("desc", pattern="^(asc|desc)$"),
+    sort_by: SortField = Query("created_at"),
+    sort_order: SortOrder = Query("desc"),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db_session),
 ):
@@ -98,15 +129,13 @@ async def list_notes(
         cache_key += f":type:{content_type}"
     if tags:
         cache_key += f":tags:{'_'.join(sorted(tags))}"
+    if cursor:
+        cache_key += f":cursor:{cursor}"
 
-    # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=[NoteResponse(**n) for n in cached_data["notes"]],
-            message=f"Found {cached_data['total']} notes",
-            meta=cached_data["meta"],
-        )
+    # Try cache - stored as the final JSON body, zstd-compressed
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss - query DB
     query_params = NoteQueryParams(
@@ -117,31 +146,76 @@ async def list_notes(
         page_size=page_size,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
 
+    # The filtered total is shared by every page of the same filters.
+    # An unfiltered first page counts cheaply, so it skips this cache.
+    count_key = None
+    known_total = None
+    if page > 1 or cursor or search or tags:
+        count_key = _count_cache_key(
+            user_id, search, content_type, sorted(tags or ())
+        )
+        known_total = await cache.get(count_key)
+
     service = NoteService(db)
-    notes, total = service.get_user_notes(current_user.id, query_params)
+    try:
+        result = service.get_user_notes(
+            current_user.id, query_params, known_total
+        )
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+
+    if count_key and known_total is None and result["total_count"] is not None:
+        await cache.set(
+            count_key,
+            result["total_count"],
+            ttl=45,
+            index=cache.user_index(user_id),
+        )
 
-    # Prepare response
-    notes_data = [NoteResponse.model_validate(n).model_dump() for n in notes]
+    # Keyset mode skips the count, so there is no total to report
+    total = result["total_count"]
     meta = {
         "total_count": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size,
+        "total_pages": (
+            (total + page_size - 1) // page_size if total is not None else None
+        ),
+        "has_more": result["has_more"],
+        "next_cursor": result["next_cursor"],
     }
+    message = (
+        f"Found {total} notes"
+        if total is not None
+        else f"Found {len(result['notes'])} notes"
+    )
 
-    # Cache for 60 seconds
-    await cache.set(
-        cache_key, {"notes": notes_data, "total": total, "meta": meta}, ttl=60
+    head, tail = envelope_parts(
+        success_response(data=[], message=message, meta=meta), "data"
     )
 
-    return success_response(
-        data=[NoteResponse(**n) for n in notes_data],
-        message=f"Found {total} notes",
-        meta=meta,
+    # Splice pre-encoded notes into the envelope; the page is bounded by
+    # page_size, so one body is built and cached up front
+    body = (
+        head
+        + b",".join(
+            orjson.dumps(_note_response(n).model_dump())
+            for n in result["notes"]
+        )
+        + tail
+    )
+
+    # Cache for 60 seconds; hits replay the body as built, so its
+    # timestamp is when the list was read, not when it was served
+    await cache.set_compressed(
+        cache_key, body, ttl=60, index=cache.user_index(user_id)
     )
 
+    return _json_response(body)
+
 
 @notes_router.get("/stats/summary")
 async def get_stats(
@@ -164,7 +238,9 @@ async def get_stats(
     stats = service.get_user_notes_stats(current_user.id)
 
     # Cache for 5 minutes
-    await cache.set(cache_key, stats, ttl=300)
+    await cache.set(
+        cache_key, stats, ttl=300, index=cache.user_index(user_id)
+    )
 
     return success_response(data=stats, message="Statistics retrieved")
 
@@ -176,14 +252,12 @@ async def get_note(
     db: Session = Depends(get_db_session),
 ):
     """Get single note with 5min cache"""
-    cache_key = f"note:{note_id}"
+    cache_key = f"note:{current_user.id}:{note_id}"
 
-    # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=NoteResponse(**cached_data), message="Note retrieved"
-        )
+    # Try cache - stored as the final JSON body, zstd-compressed
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     service = NoteService(db)
@@ -193,12 +267,10 @@ async def get_note(
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Note not found")
 
     # Cache for 5 minutes
-    note_data = NoteResponse.model_validate(note).model_dump()
-    await cache.set(cache_key, note_data, ttl=300)
+    body = _encode(_note_response(note), "Note retrieved")
+    await cache.set_compressed(cache_key, body, ttl=300)
 
-    return success_response(
-        data=NoteResponse(**note_data), message="Note retrieved"
-    )
+    return _json_response(body)
 
 
 @notes_router.put("/{note_id}")
@@ -255,12 +327,12 @@ async def get_questions(
     db: Session = Depends(get_db_session),
 ):
     """Get questions with 10min cache"""
-    cache_key = f"note_questions:{note_id}"
+    cache_key = f"note_questions:{current_user.id}:{note_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(data=[QuestionBase(**q) for q in cached_data])
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     service = NoteService(db)
@@ -270,12 +342,10 @@ async def get_questions(
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Note not found")
 
     # Cache for 10 minutes
-    questions_data = [
-        QuestionBase.model_validate(q).model_dump() for q in questions
-    ]
-    await cache.set(cache_key, questions_data, ttl=600)
+    body = _encode([QuestionBase.model_validate(q) for q in questions])
+    await cache.set_compressed(cache_key, body, ttl=600)
 
-    return success_response(data=[QuestionBase(**q) for q in questions_data])
+    return _json_response(body)
 
 
 @notes_router.get("/{note_id}/enhanced")
@@ -285,14 +355,12 @@ async def get_enhanced(
     db: Session = Depends(get_db_session),
 ):
     """Get enhanced versions with 10min cache"""
-    cache_key = f"note_enhanced:{note_id}"
+    cache_key = f"note_enhanced:{current_user.id}:{note_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=[EnhancedNoteResponse(**v) for v in cached_data]
-        )
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     service = NoteService(db)
@@ -302,14 +370,10 @@ async def get_enhanced(
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Note not found")
 
     # Cache for 10 minutes
-    versions_data = [
-        EnhancedNoteResponse.model_validate(v).model_dump() for v in versions
-    ]
-    await cache.set(cache_key, versions_data, ttl=600)
+    body = _encode([EnhancedNoteResponse.model_validate(v) for v in versions])
+    await cache.set_compressed(cache_key, body, ttl=600)
 
-    return success_response(
-        data=[EnhancedNoteResponse(**v) for v in versions_data]
-    )
+    return _json_response(body)
 
 
 @notes_router.get("/{note_id}/meta")
@@ -319,31 +383,25 @@ async def get_note_meta(
     db: Session = Depends(get_db_session),
 ):
     """Get metadata with 5min cache"""
-    cache_key = f"note_meta:{note_id}"
+    cache_key = f"note_meta:{current_user.id}:{note_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(data=NoteMetaResponse(**cached_data))
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
-    # Cache miss
+    # Cache miss - counts come from one query, no child rows are loaded
     service = NoteService(db)
-    note = service.get_note_by_id(note_id, current_user.id)
+    meta = service.get_note_meta_optimized(note_id, current_user.id)
 
-    if not note:
+    if not meta:
         raise HTTPException(404, "Note not found")
 
-    meta_data = {
-        "enhanced_count": len(note.enhanced_versions),
-        "quiz_count": len(note.quizzes),
-        "question_count": len(note.questions),
-        "summary_count": len(note.summaries),
-    }
-
     # Cache for 5 minutes
-    await cache.set(cache_key, meta_data, ttl=300)
+    body = _encode(NoteMetaResponse(**meta))
+    await cache.set_compressed(cache_key, body, ttl=300)
 
-    return success_response(data=NoteMetaResponse(**meta_data))
+    return _json_response(body)
 
 
 @notes_router.get("/summaries/{note_id}")
@@ -353,14 +411,12 @@ async def get_summaries(
     db: Session = Depends(get_db_session),
 ):
     """Get summaries with 10min cache"""
-    cache_key = f"note_summaries:{note_id}"
+    cache_key = f"note_summaries:{current_user.id}:{note_id}"
 
     # Try cache
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return success_response(
-            data=[NoteSummaryResponse(**s) for s in cached_data]
-        )
+    cached_body = await cache.get_compressed(cache_key)
+    if cached_body:
+        return _json_response(cached_body)
 
     # Cache miss
     service = NoteService(db)
@@ -370,14 +426,10 @@ async def get_summaries(
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Note not found")
 
     # Cache for 10 minutes
-    summaries_data = [
-        NoteSummaryResponse.model_validate(s).model_dump() for s in summaries
-    ]
-    await cache.set(cache_key, summaries_data, ttl=600)
+    body = _encode([NoteSummaryResponse.model_validate(s) for s in summaries])
+    await cache.set_compressed(cache_key, body, ttl=600)
 
-    return success_response(
-        data=[NoteSummaryResponse(**s) for s in summaries_data]
-    )
+    return _json_response(body)
 
 
 @notes_router.post("/{note_id}/quiz/generate")
@@ -465,7 +517,12 @@ async def get_quizzes(
         )
 
     # Cache for 5 minutes
-    await cache.set(cache_key, quizzes_data, ttl=300)
+    await cache.set(
+        cache_key,
+        quizzes_data,
+        ttl=300,
+        index=cache.user_index(current_user.id),
+    )
 
     return success_response(
         data=[QuizWithSubmission(**q) for q in quizzes_data]
@@ -481,52 +538,46 @@ async def submit_quiz(
 ):
     """Submit quiz and invalidate quiz cache"""
     service = NoteService(db)
-    quiz = service.get_quiz_by_id(submission.quiz_id, current_user.id)
+    scored = service.score_quiz(
+        submission.quiz_id, current_user.id, submission.answers
+    )
 
-    if not quiz:
+    if not scored:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quiz not found")
 
+    # Correctness comes back from SQL; just collect the rows
     results = {}
     correct = 0
     stored_answers = {}
 
-    for question in quiz.questions:
-        user_answer = submission.answers.get(question.id)
-        is_correct = user_answer == question.correct_answer
-
-        if is_correct:
-            correct += 1
-
-        results[question.id] = QuizResultDetail(
-            is_correct=is_correct,
-            explanation=question.explanation if not is_correct else None,
+    for row in scored:
+        correct += row.is_correct
+        results[row.id] = QuizResultDetail(
+            is_correct=row.is_correct, explanation=row.explanation
         )
-        stored_answers[str(question.id)] = user_answer
+        stored_answers[str(row.id)] = row.user_answer
 
+    total = len(scored)
     service.create_quiz_submission(
         quiz_id=submission.quiz_id,
         answers=stored_answers,
         score=correct,
-        total=len(quiz.questions),
+        total=total,
     )
 
-    # Invalidate quiz cache
+    # Invalidate the cached quizzes of this quiz's note
     background_tasks.add_task(
-        cache.delete, f"note_quizzes:*:{current_user.id}"
+        cache.unlink, f"note_quizzes:{scored[0].note_id}:{current_user.id}"
     )
 
     return success_response(
         data=QuizSubmitResponse(
             quiz_id=submission.quiz_id,
             correct_count=correct,
-            total_count=len(quiz.questions),
+            total_count=total,
             results=results,
         ),
-        message=(
-            "Perfect score!"
-            if correct == len(quiz.questions)
-            else "Quiz submitted"
-        ),
+        message="Perfect score!" if correct == total else "Quiz submitted",
     )
 
 
@@ -142,10 +142,9 @@ def task_generate_quiz(note_id: int, user_id: UUID) -> dict:
 
             # Build context
             context = note.content[:500]
-            if note.enhanced_versions:
-                context += (
-                    f"\n\nEnhanced: {note.enhanced_versions[0].content[:300]}"
-                )
+            versions = note_service.get_enhanced_versions(note_id, user_id)
+            if versions:
+                context += f"\n\nEnhanced: {versions[0].content[:300]}"
 
             prompt = f"""Create exactly 5 multiple choice questions.
 
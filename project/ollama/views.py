@@ -2,7 +2,7 @@
 project/ollama/views.py
 """
 
-import json
+import orjson
 from fastapi import Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
@@ -28,6 +28,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _sse(payload: dict) -> bytes:
+    """Encode one SSE data frame with orjson"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
 class NoteRequest(BaseModel):
     note_id: int
 
@@ -62,33 +67,32 @@ async def enhance_note_streaming(
         raise HTTPException(404, "Note not found")
 
     task = task_stream_enhance_note.delay(
-        note_request.note_id, current_user.id
+        note_request.note_id, str(current_user.id)
     )
 
     async def generate():
-        yield f" \
-            data: {json.dumps({'task_id': task.id, 'status': 'started'})}\n\n"
+        yield _sse({"task_id": task.id, "status": "started"})
 
         prompt = f"""Improve and expand:
 Title: {note.title}
 Content: {note.content}
 Enhanced:"""
 
-        full_text = ""
+        parts: list[str] = []
         try:
             async for chunk in ollama_service.stream_generate(prompt):
                 content = chunk.get("response", "")
-                full_text += content
-                yield f" \
-                    data: {json.dumps({'chunk': content, 'done': False})}\n\n"
+                parts.append(content)
+                yield _sse({"chunk": content, "done": False})
 
                 if chunk.get("done"):
                     break
 
+            full_text = "".join(parts)
             from project.ollama.tasks import task_save_enhanced_note
 
             task_save_enhanced_note.delay(note.id, full_text)
-            response = json.dumps(
+            yield _sse(
                 {
                     "chunk": "",
                     "done": True,
@@ -96,10 +100,8 @@ Enhanced:"""
                     "task_id": task.id,
                 }
             )
-
-            yield f"data: {response}\n\n"
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+            yield _sse({"error": str(e), "done": True})
 
     return StreamingResponse(generate(), media_type="text/event-stream")
 
@@ -126,11 +128,12 @@ async def generate_summary_stream(
     if not note:
         raise HTTPException(404, "Note not found")
 
-    task = task_stream_summary.delay(note_request.note_id, current_user.id)
+    task = task_stream_summary.delay(
+        note_request.note_id, str(current_user.id)
+    )
 
     async def generate():
-        yield f" \
-            data: {json.dumps({'task_id': task.id, 'status': 'started'})}\n\n"
+        yield _sse({"task_id": task.id, "status": "started"})
 
         # Build context
         context_parts = []
@@ -170,21 +173,21 @@ Must Provide:
 
 Summary:"""
 
-        full_text = ""
+        parts: list[str] = []
         try:
             async for chunk in ollama_service.stream_generate(prompt):
                 content = chunk.get("response", "")
-                full_text += content
-                yield f" \
-                    data: {json.dumps({'chunk': content, 'done': False})}\n\n"
+                parts.append(content)
+                yield _sse({"chunk": content, "done": False})
 
                 if chunk.get("done"):
                     break
 
+            full_text = "".join(parts)
             from project.ollama.tasks import task_save_summary
 
             task_save_summary.delay(note.id, full_text)
-            response = json.dumps(
+            yield _sse(
                 {
                     "chunk": "",
                     "done": True,
@@ -192,9 +195,8 @@ Summary:"""
                     "task_id": task.id,
                 }
             )
-            yield f"data: {response}\n\n"
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+            yield _sse({"error": str(e), "done": True})
 
     return StreamingResponse(generate(), media_type="text/event-stream")
 
@@ -220,7 +222,7 @@ def summarize_note_streaming(
         raise HTTPException(404, "Note not found")
 
     task = task_stream_summarize_note.delay(
-        note_request.note_id, current_user.id
+        note_request.note_id, str(current_user.id)
     )
 
     task_service = TaskService(db)
@@ -275,28 +277,26 @@ Question: {request.question_text}
 
 Provide clear explanation with up to 3 examples."""
 
-            full_answer = ""
+            parts: list[str] = []
             async for chunk in ollama_service.stream_generate(prompt):
                 content = chunk.get("response", "")
-                full_answer += content
-                yield f" \
-                    data: {json.dumps({'chunk': content, 'done': False})}\n\n"
+                parts.append(content)
+                yield _sse({"chunk": content, "done": False})
 
                 if chunk.get("done"):
                     break
 
+            full_answer = "".join(parts)
             from project.ollama.tasks import task_save_question
 
             task_save_question.delay(
                 request.note_id, request.question_text, full_answer
             )
-            response = json.dumps(
+            yield _sse(
                 {"chunk": "", "done": True, "full_answer": full_answer}
             )
-
-            yield f"data: {response}\n\n"
         except Exception as e:
             logger.error(f"Stream error: {e}")
-            yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+            yield _sse({"error": str(e), "done": True})
 
     return StreamingResponse(generate(), media_type="text/event-stream")
@@ -2,10 +2,12 @@
 project/schemas/response.py - Standardized API responses
 """
 
-from typing import Any, Dict, Optional, TypeVar, Generic
+from typing import Any, Dict, Optional, Tuple, TypeVar, Generic
 from pydantic import BaseModel
 from datetime import datetime
 
+import orjson
+
 T = TypeVar("T")
 
 
@@ -55,6 +57,23 @@ def success_response(
     return response
 
 
+def envelope_parts(envelope: Dict, *path: str) -> Tuple[bytes, bytes]:
+    """Head and tail bytes around the list at envelope[path], built from
+    the other fields so pre-encoded items can be joined in between"""
+    key, *rest = path
+    others = {k: v for k, v in envelope.items() if k != key}
+    if rest:
+        head, tail = envelope_parts(envelope[key], *rest)
+    else:
+        head, tail = b"[", b"]"
+
+    head = b"{" + orjson.dumps(key) + b":" + head
+    # Dumping the remaining fields as an object and dropping its "{"
+    # appends them after the list as valid JSON members
+    tail += b"," + orjson.dumps(others)[1:] if others else b"}"
+    return head, tail
+
+
 def error_response(
     code: str,
     message: str,
@@ -6,7 +6,7 @@ Fixed test fixtures with proper model imports
 
 import os
 import pytest
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 import warnings
 
 warnings.filterwarnings(
@@ -63,6 +63,49 @@ def db_session(engine, create_tables):
     connection.close()
 
 
+@pytest.fixture
+def count_queries(engine):
+    """Context manager collecting SQL statements run on the test engine"""
+    from sqlalchemy import event
+
+    @contextmanager
+    def counter():
+        queries = []
+
+        def record(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
+
+
+@pytest.fixture
+def notes_api_client():
+    """Notes API with auth and the DB session stubbed out, for tests
+    that patch NoteService and need no database"""
+    from types import SimpleNamespace
+    from uuid import uuid4
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from project.auth.dependencies import get_current_user
+    from project.database import get_db_session
+    from project.notes import notes_router
+
+    app = FastAPI()
+    app.include_router(notes_router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        id=uuid4()
+    )
+    app.dependency_overrides[get_db_session] = lambda: SimpleNamespace()
+
+    return TestClient(app)
+
+
 @pytest.fixture
 def app_no_middleware(db_session):
     """Minimal app without rate limiting middleware"""
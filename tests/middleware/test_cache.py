@@ -0,0 +1,160 @@
+"""
+tests/middleware/test_cache.py
+"""
+
+import asyncio
+
+import pytest
+
+
+def test_cached_waiter_survives_cancelled_caller():
+    """Test a coalesced waiter reruns the miss when the first caller is
+    cancelled, instead of failing with its CancelledError"""
+    from project.middleware.cache import cached
+
+    calls = []
+
+    async def run():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        @cached(ttl=60, key_prefix="test_coalesce")
+        async def load(key):
+            calls.append(key)
+            started.set()
+            await release.wait()
+            return {"key": key}
+
+        first = asyncio.create_task(load("k"))
+        await started.wait()
+
+        # Second caller coalesces onto the first one's in-flight miss
+        second = asyncio.create_task(load("k"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        release.set()
+        return await asyncio.wait_for(second, timeout=1)
+
+    assert asyncio.run(run()) == {"key": "k"}
+    assert calls == ["k", "k"]
+
+
+def _run_middleware(path, headers=(), entries=None):
+    """Send one GET through CacheMiddleware over an in-memory store;
+    returns (status, headers, body, paths the app was called with)"""
+    from project.middleware.cache import CacheMiddleware
+
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        body = b'{"success":true}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = CacheMiddleware(app)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": list(headers),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await middleware(scope, receive, send)
+        # Let a scheduled stale refresh finish
+        await asyncio.gather(*list(middleware._refreshing.values()))
+
+    asyncio.run(run())
+    start = sent[0]
+    return start["status"], dict(start["headers"]), sent[1]["body"], calls
+
+
+@pytest.fixture
+def http_cache_store(monkeypatch):
+    """In-memory stand-in for the Redis calls CacheMiddleware makes"""
+    from project.middleware.cache import cache
+
+    store = {}
+
+    async def get_compressed(key):
+        return store.get(key)
+
+    async def set_raw(key, payload, ttl=300, index=None, nx=False):
+        store[key] = payload
+        return True
+
+    monkeypatch.setattr(cache, "get_compressed", get_compressed)
+    monkeypatch.setattr(cache, "set_raw", set_raw)
+    monkeypatch.setattr(cache, "set_compressed", set_raw)
+    return store
+
+
+def test_http_cache_serves_mounted_notes_routes(http_cache_store):
+    """Test notes paths under the /api/v1 mount hit, then serve stale
+    while refreshing"""
+    from project.api import api_v1
+
+    path = f"{api_v1.prefix}/notes/"
+    auth = [(b"authorization", b"Bearer user-a")]
+
+    _, headers, _, calls = _run_middleware(path, auth)
+    assert b"x-cache" not in headers
+    assert calls == [path]
+
+    status, headers, body, calls = _run_middleware(path, auth)
+    assert (status, headers[b"x-cache"]) == (200, b"hit")
+    assert body == b'{"success":true}'
+    assert calls == []
+
+    # Expire the fresh window; the stale body is served and refreshed
+    (key,) = http_cache_store
+    http_cache_store[key] = b"0.0\n" + http_cache_store[key].split(b"\n", 1)[1]
+    _, headers, _, calls = _run_middleware(path, auth)
+    assert headers[b"x-cache"] == b"stale"
+    assert calls == [path]
+    assert float(http_cache_store[key].split(b"\n", 1)[0]) > 0
+
+
+def test_http_cache_is_scoped_per_user(http_cache_store):
+    """Test a cached notes body is never served to another caller"""
+    from project.api import api_v1
+
+    path = f"{api_v1.prefix}/notes/stats/summary"
+    _run_middleware(path, [(b"authorization", b"Bearer user-a")])
+
+    _, headers, _, calls = _run_middleware(
+        path, [(b"authorization", b"Bearer user-b")]
+    )
+    assert b"x-cache" not in headers
+    assert calls == [path]
+
+
+def test_http_cache_skips_health(http_cache_store):
+    """Test health probes always reach the app"""
+    _run_middleware("/health")
+    _, headers, _, calls = _run_middleware("/health")
+    assert b"x-cache" not in headers
+    assert calls == ["/health"]
+    assert http_cache_store == {}
@@ -13,7 +13,9 @@ def test_rate_limiting_login_endpoint(client_with_middleware):
     # First 5 requests should pass (even if 401)
     responses = []
     for i in range(6):
-        response = client_with_middleware.post("/auth/login", data=login_data)
+        response = client_with_middleware.post(
+            "/api/v1/auth/login", data=login_data
+        )
         responses.append(response.status_code)
         if response.status_code == 429:
             break
@@ -0,0 +1,67 @@
+"""
+tests/notes/test_notes_models.py
+
+Test cases for the notes words_count generated column expression
+"""
+
+import importlib.util
+import re
+from pathlib import Path
+
+import pytest
+
+from project.notes.models import WORDS_COUNT_SQL
+
+MIGRATION = (
+    Path(__file__).resolve().parents[2]
+    / "alembic"
+    / "versions"
+    / "9a3d5e7f1b20_generate_notes_words_count.py"
+)
+
+SQL_PARTS = re.compile(
+    r"content ~ '(?P<blank>[^']*)'.*"
+    r"regexp_replace\(content, '(?P<trim>[^']*)', '', 'g'\), "
+    r"'(?P<split>[^']*)'\)"
+)
+
+
+def _sql_words_count(content):
+    """Evaluate WORDS_COUNT_SQL in Python, using its own regex literals"""
+    blank, trim, split = SQL_PARTS.search(WORDS_COUNT_SQL).groups()
+    if re.search(blank, content):
+        return 0
+    return len(re.split(split, re.sub(trim, "", content)))
+
+
+def test_words_count_sql_shape():
+    """Expression trims and splits with the regexes evaluated below"""
+    match = SQL_PARTS.search(WORDS_COUNT_SQL)
+    assert match is not None
+    assert match.groups() == (r"^\s*$", r"^\s+|\s+$", r"\s+")
+    assert "btrim" not in WORDS_COUNT_SQL
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        " \t\n\r\f\v",
+        "one",
+        "one two",
+        "\f\vone\ttwo\nthree\rfour\ffive\vsix\f\v",
+        "\v lead and trail \f",
+        "a\f\fb\v\vc",
+    ],
+)
+def test_words_count_matches_str_split(content):
+    """Generated column counts like len(content.split())"""
+    assert _sql_words_count(content) == len(content.split())
+
+
+def test_migration_matches_model():
+    """Migration creates the column with the model's expression"""
+    spec = importlib.util.spec_from_file_location("migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    assert migration.WORDS_COUNT_SQL == WORDS_COUNT_SQL
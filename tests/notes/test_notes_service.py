@@ -0,0 +1,80 @@
+"""
+tests/notes/test_notes_service.py
+
+Test cases for NoteService keyset pagination
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from project.notes.schemas import NoteQueryParams
+from project.notes.service import NoteService, _decode_cursor, _encode_cursor
+
+
+class FakeSession:
+    """Session stub returning canned rows from scalars()"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def scalars(self, statement, params=None):
+        self.statements.append(statement)
+        return iter(self.rows)
+
+
+def test_cursor_round_trip():
+    """Test cursors decode back to the (sort value, id) they encode"""
+    created = datetime(2026, 1, 5, 12, 30)
+
+    assert _decode_cursor(_encode_cursor(created, 42), "created_at") == (
+        created,
+        42,
+    )
+    assert _decode_cursor(_encode_cursor("Title", 7), "title") == (
+        "Title",
+        7,
+    )
+
+
+def test_invalid_cursor_raises():
+    """Test malformed cursors raise ValueError"""
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _decode_cursor("not-a-cursor", "created_at")
+
+
+def test_get_user_notes_cursor_pages():
+    """Test next_cursor/has_more across keyset pages"""
+    rows = [
+        SimpleNamespace(id=10 - i, created_at=datetime(2026, 1, 10 - i))
+        for i in range(3)
+    ]
+    params = NoteQueryParams(
+        page_size=2, cursor=_encode_cursor(datetime(2026, 1, 11), 11)
+    )
+
+    # page_size + 1 rows back means another page exists
+    first = NoteService(FakeSession(rows)).get_user_notes(uuid4(), params)
+    assert first["has_more"] is True
+    assert first["notes"] == rows[:2]
+    assert first["total_count"] is None
+    assert _decode_cursor(first["next_cursor"], "created_at") == (
+        rows[1].created_at,
+        rows[1].id,
+    )
+
+    # The next page seeks past the last row of the first
+    session = FakeSession(rows[2:])
+    last = NoteService(session).get_user_notes(
+        uuid4(), params.model_copy(update={"cursor": first["next_cursor"]})
+    )
+    bound = session.statements[0].compile().params.values()
+    assert rows[1].created_at in bound
+    assert rows[1].id in bound
+
+    assert last["has_more"] is False
+    assert last["next_cursor"] is None
+    assert last["notes"] == rows[2:]
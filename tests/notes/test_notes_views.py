@@ -5,6 +5,7 @@ Test cases for Notes App views
 """
 
 import warnings
+from types import SimpleNamespace
 
 warnings.filterwarnings(
     "ignore", category=DeprecationWarning, module="passlib"
@@ -131,6 +132,35 @@ def test_list_notes_with_search(client_no_middleware, db_session):
     assert "Python" in data["data"][0]["title"]
 
 
+def test_list_notes_query_count(
+    client_no_middleware, db_session, count_queries
+):
+    """Test listing notes runs a fixed number of queries, not one per row"""
+    user_data = {
+        "email": "querycount@example.com",
+        "password": "password123",
+    }
+
+    register_response = client_no_middleware.post(
+        "/auth/register", json=user_data
+    )
+    token = register_response.json()["token"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for i in range(20):
+        note_data = {"title": f"Note {i+1}", "content": f"Content {i+1}"}
+        client_no_middleware.post("/notes/", json=note_data, headers=headers)
+
+    with count_queries() as queries:
+        response = client_no_middleware.get(
+            "/notes/?page_size=20", headers=headers
+        )
+    assert response.status_code == 200
+
+    # User lookup, count, page
+    assert len(queries) <= 3
+
+
 def test_list_notes_unauthenticated(client_no_middleware):
     """Test listing notes without authentication returns 403"""
     response = client_no_middleware.get("/notes/")
@@ -445,3 +475,82 @@ def test_notes_user_isolation(client_no_middleware, db_session):
         f"/notes/{note_id}", headers=user2_headers
     )
     assert response.status_code == 404
+
+
+def test_list_notes_invalid_cursor(notes_api_client):
+    """Test a malformed keyset cursor is rejected with 400"""
+    response = notes_api_client.get("/notes/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_submit_quiz_scores_wrong_and_missing_answers(
+    notes_api_client, monkeypatch
+):
+    """Test wrong and unanswered questions score as incorrect"""
+    from project.notes.service import NoteService
+
+    scored = [
+        SimpleNamespace(
+            id=1, note_id=5, user_answer="A", is_correct=True, explanation=None
+        ),
+        SimpleNamespace(
+            id=2,
+            note_id=5,
+            user_answer="B",
+            is_correct=False,
+            explanation="It is C",
+        ),
+        SimpleNamespace(
+            id=3,
+            note_id=5,
+            user_answer=None,
+            is_correct=False,
+            explanation="It is D",
+        ),
+    ]
+    saved = {}
+    monkeypatch.setattr(
+        NoteService, "score_quiz", lambda self, quiz_id, user_id, a: scored
+    )
+    monkeypatch.setattr(
+        NoteService,
+        "create_quiz_submission",
+        lambda self, **kwargs: saved.update(kwargs),
+    )
+
+    response = notes_api_client.post(
+        "/notes/quiz/submit",
+        json={"quiz_id": 7, "answers": {"1": "A", "2": "B"}},
+    )
+    assert response.status_code == 200
+
+    data = response.json()["data"]
+    assert data["correct_count"] == 1
+    assert data["total_count"] == 3
+    assert data["results"]["1"] == {"is_correct": True, "explanation": None}
+    assert data["results"]["2"] == {
+        "is_correct": False,
+        "explanation": "It is C",
+    }
+    assert data["results"]["3"]["is_correct"] is False
+
+    # Unanswered questions are stored as None
+    assert saved["answers"] == {"1": "A", "2": "B", "3": None}
+    assert saved["score"] == 1
+    assert saved["total"] == 3
+
+
+def test_submit_quiz_without_questions_not_found(
+    notes_api_client, monkeypatch
+):
+    """Test a quiz with no questions (or not the user's) returns 404"""
+    from project.notes.service import NoteService
+
+    monkeypatch.setattr(
+        NoteService, "score_quiz", lambda self, quiz_id, user_id, a: []
+    )
+
+    response = notes_api_client.post(
+        "/notes/quiz/submit", json={"quiz_id": 7, "answers": {}}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,25 @@
+"""
+tests/ollama/test_ollama_views.py
+
+Test cases for Ollama streaming views
+"""
+
+
+def test_sse_frame_bytes():
+    """Test SSE frames are compact orjson with one data line each"""
+    from project.ollama.views import _sse
+
+    assert _sse({"task_id": "t1", "status": "started"}) == (
+        b'data: {"task_id":"t1","status":"started"}\n\n'
+    )
+    assert _sse({"chunk": 'say "hi"\n', "done": False}) == (
+        b'data: {"chunk":"say \\"hi\\"\\n","done":false}\n\n'
+    )
+
+
+def test_sse_frame_keeps_non_ascii_as_utf8():
+    """Test non-ASCII text is sent as raw UTF-8, not \\u escapes"""
+    from project.ollama.views import _sse
+
+    frame = _sse({"chunk": "café 日本", "done": False})
+    assert frame == 'data: {"chunk":"café 日本","done":false}\n\n'.encode()